@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from video_probe import probe_video
+from vision_1_video_slicer import CONTAINER_CODECS
+from vision_2_chunked_resize import VIDEO_EXTENSIONS
+
+# Audio output formats: the codecs each can hold as-is, and how to encode otherwise
+AUDIO_FORMATS = {
+    '.mp3': ({'mp3'}, ['-c:a', 'libmp3lame', '-q:a', '3']),
+    '.wav': ({'pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'pcm_u8'}, ['-c:a', 'pcm_s16le']),
+    '.opus': ({'opus'}, ['-c:a', 'libopus', '-b:a', '96k']),
+    '.ogg': ({'vorbis', 'opus', 'flac'}, ['-c:a', 'libvorbis', '-q:a', '5']),
+    '.m4a': ({'aac', 'alac'}, ['-c:a', 'aac', '-b:a', '192k']),
+    '.aac': ({'aac'}, ['-c:a', 'aac', '-b:a', '192k']),
+    '.flac': ({'flac'}, ['-c:a', 'flac']),
+    '.mka': (None, ['-c:a', 'flac']),
+}
+
+# Formats written by default when extracting a directory
+DEFAULT_FORMATS = ('.mp3',)
+
+
+def audio_output_args(audio_codec, output_file, threads=None):
+    """
+    ffmpeg arguments that write the audio stream to one output file.
+
+    The stream is copied when the output format can hold its codec (no
+    decode, no quality loss), otherwise it is encoded for that format.
+
+    Args:
+        audio_codec (str): Codec name of the source audio stream
+        output_file (str): Path of the output; its extension picks the format
+        threads (int): Threads the encoder of this output may use
+
+    Returns:
+        list: ffmpeg output arguments, ending with the output path
+    """
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension in AUDIO_FORMATS:
+        allowed, encode_args = AUDIO_FORMATS[extension]
+    elif extension in CONTAINER_CODECS:
+        allowed, encode_args = CONTAINER_CODECS[extension], ['-c:a', 'aac', '-b:a', '192k']
+    else:
+        raise ValueError(f"Unsupported audio output format '{extension}'")
+
+    codec_args = ['-c:a', 'copy'] if allowed is None or audio_codec in allowed else encode_args
+    if threads:
+        codec_args = codec_args + ['-threads', str(threads)]
+    return ['-map', '0:a:0', '-vn', '-sn', '-dn'] + codec_args + [output_file]
+
+
+def extract_audio(input_file, output_files, threads=None):
+    """
+    Extracts the audio track of a video to one or more files in one ffmpeg run.
+
+    The input is read once. Outputs that can hold the source codec get a
+    stream copy; all the others share a single decode of the audio and are
+    encoded side by side, e.g. MP3, WAV and Opus from one pass.
+
+    Args:
+        input_file (str): Path to the input video
+        output_files (str|list): Output path(s); the extension picks the format
+        threads (int): Threads each output's encoder may use; ffmpeg picks if None
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if isinstance(output_files, str):
+        output_files = [output_files]
+
+    try:
+        probe = probe_video(input_file)
+        audio_stream = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+        if audio_stream is None:
+            print(f"Error: {input_file} has no audio stream")
+            return False
+
+        # -threads is an output option here, so it limits the encoders too
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', input_file]
+
+        copied = []
+        for output_file in output_files:
+            args = audio_output_args(audio_stream['codec_name'], output_file, threads)
+            if args[args.index('-c:a') + 1] == 'copy':
+                copied.append(output_file)
+            cmd += args
+
+        print(f"{input_file}: {audio_stream['codec_name']} audio, "
+              f"{len(copied)} stream copied, {len(output_files) - len(copied)} encoded")
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+        for output_file in output_files:
+            print(f"Successfully extracted audio to {output_file}")
+        return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"An error occurred: {e.stderr}")
+        return False
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        return False
+
+
+def extract_directory(input_dir, output_dir, formats=DEFAULT_FORMATS, workers=None):
+    """
+    Extracts the audio of every video of a directory under one CPU budget.
+
+    Each file is one ffmpeg run writing all `formats`; at most `workers`
+    run at a time and share the CPUs between them. Audio encoders are
+    mostly single-threaded, so the default is one file per CPU.
+
+    Args:
+        input_dir (str): Directory with the input videos
+        output_dir (str): Directory for the audio files (created if missing)
+        formats (tuple): Output extensions, e.g. ('.mp3', '.wav', '.opus')
+        workers (int): Number of concurrent extractions (defaults to the CPU count)
+
+    Returns:
+        dict: Input path -> True/False
+    """
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(output_dir, exist_ok=True)
+
+    inputs = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for input_file in inputs:
+            stem = os.path.splitext(os.path.basename(input_file))[0]
+            output_files = [os.path.join(output_dir, stem + extension) for extension in formats]
+            futures[input_file] = executor.submit(extract_audio, input_file, output_files, threads)
+
+    return {input_file: future.result() for input_file, future in futures.items()}
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python audio_extract.py input.mp4 output.mp3 output.wav output.opus
+    #   python audio_extract.py videos/ audio/ --formats=.mp3,.opus --workers=4
+    options = {'formats': ','.join(DEFAULT_FORMATS), 'workers': None}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            sys.argv.remove(arg)
+            name, value = arg[2:].split("=", 1)
+            options[name] = value if name == 'formats' else int(value)
+
+    input_path = sys.argv[1] if len(sys.argv) > 1 else "input.mp4"
+    outputs = sys.argv[2:] or ["output.mp3"]
+
+    if os.path.isdir(input_path):
+        results = extract_directory(input_path, outputs[0], tuple(options['formats'].split(',')), options['workers'])
+        print(f"{sum(results.values())}/{len(results)} files extracted")
+    else:
+        extract_audio(input_path, outputs)
@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+from overlay_sequence import OverlaySequence
+
+# Periodic wave shapes, all with period 2*pi and amplitude 1
+WAVES = {
+    'sine': np.sin,
+    'cosine': np.cos,
+    'square': lambda t: np.sign(np.sin(t)),
+    'triangle': lambda t: 2 / np.pi * np.arcsin(np.sin(t)),
+    'sawtooth': lambda t: 2 * ((t / (2 * np.pi) + 0.5) % 1.0) - 1,
+}
+
+# Fractional bits of the point coordinates passed to OpenCV (1/16 pixel)
+SUBPIXEL_BITS = 4
+
+
+def rasterize_curve(width, height, xs, ys, color, thickness=2, antialias=True,
+                    x_range=None, y_range=(-1.5, 1.5), margin=4):
+    """
+    Draw a curve straight into a transparent BGRA buffer.
+
+    The curve is drawn once as a coverage mask (antialiased with subpixel
+    precision); the mask becomes the alpha channel and the color fills
+    the rest, so the edges blend smoothly onto the video.
+
+    Args:
+        width (int): Width of the buffer in pixels
+        height (int): Height of the buffer in pixels
+        xs (numpy.ndarray): X coordinates of the curve points
+        ys (numpy.ndarray): Y coordinates of the curve points
+        color (tuple): BGR color
+        thickness (int): Line thickness in pixels
+        antialias (bool): Smooth edges (cv2.LINE_AA) instead of hard ones
+        x_range (tuple): (min, max) data x mapped to the buffer width; defaults to the range of xs
+        y_range (tuple): (min, max) data y mapped to the buffer height (like plt.ylim)
+        margin (int): Pixels left free around the plot area
+
+    Returns:
+        numpy.ndarray: BGRA uint8 image of shape (height, width, 4)
+    """
+    if x_range is None:
+        x_range = (float(np.min(xs)), float(np.max(xs)))
+
+    # Data coordinates -> pixel coordinates (y grows downwards)
+    scale_x = (width - 1 - 2 * margin) / (x_range[1] - x_range[0])
+    scale_y = (height - 1 - 2 * margin) / (y_range[1] - y_range[0])
+    px = margin + (np.asarray(xs) - x_range[0]) * scale_x
+    py = margin + (y_range[1] - np.asarray(ys)) * scale_y
+
+    points = np.round(np.stack([px, py], axis=1) * (1 << SUBPIXEL_BITS)).astype(np.int32)
+
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.polylines(mask, [points], False, 255, thickness,
+                  lineType=cv2.LINE_AA if antialias else cv2.LINE_8, shift=SUBPIXEL_BITS)
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[:, :, :3] = color
+    image[:, :, 3] = mask
+    return image
+
+
+class CurveSequence(OverlaySequence):
+    """
+    Animated wave overlay rendered on demand, with no PNG round trip.
+
+    Frame i draws the wave with phase i * phase_step. It can be used
+    wherever a PngSequence or AtlasSequence is, e.g. by the movable overlay
+    script.
+    """
+
+    def __init__(self, width, height, num_frames, wave='sine', phase_step=0.1,
+                 periods=2, color=(255, 0, 0), thickness=2, antialias=True,
+                 amplitude=1.0, y_range=(-1.5, 1.5), samples=None, cache_size=8):
+        """
+        Args:
+            width (int): Width of the overlay in pixels
+            height (int): Height of the overlay in pixels
+            num_frames (int): Number of frames in the animation
+            wave (str): Wave shape, a key of WAVES
+            phase_step (float): Phase advance per frame in radians
+            periods (float): Number of periods shown across the width
+            color (tuple): BGR color of the line
+            thickness (int): Line thickness in pixels
+            antialias (bool): Smooth edges
+            amplitude (float): Wave amplitude in data units
+            y_range (tuple): (min, max) data y shown in the overlay
+            samples (int): Points along the curve (defaults to 2 per pixel)
+            cache_size (int): Rendered frames kept in memory
+        """
+        if wave not in WAVES:
+            raise ValueError(f"Unknown wave '{wave}', expected one of: {', '.join(WAVES)}")
+
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        self.wave = WAVES[wave]
+        self.phase_step = phase_step
+        self.color = color
+        self.thickness = thickness
+        self.antialias = antialias
+        self.amplitude = amplitude
+        self.y_range = y_range
+        self.xs = np.linspace(0, periods * 2 * np.pi, samples or 2 * width)
+
+        # Rendering is cheaper than handing frames between threads
+        super().__init__(cache_size, read_ahead=0)
+
+    def __len__(self):
+        return self.num_frames
+
+    def render(self, index):
+        """
+        Rasterize one frame of the animation (uncached).
+
+        Args:
+            index (int): Frame number
+
+        Returns:
+            numpy.ndarray: BGRA uint8 image of shape (height, width, 4)
+        """
+        ys = self.amplitude * self.wave(self.xs + index * self.phase_step)
+        return rasterize_curve(self.width, self.height, self.xs, ys, self.color,
+                               self.thickness, self.antialias, y_range=self.y_range)
+
+    def _load(self, index):
+        return self.render(index)
@@ -1,5 +1,12 @@
 import cv2
-import numpy as np
+import os
+import sys
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from overlay_blend import load_overlay
 
 # File paths
 input_video = "input.mp4"
@@ -12,14 +19,8 @@ start_time = 2.0    # seconds
 end_time = 6.0      # seconds
 position = (100, 100)  # Top-left corner of the overlay (x, y)
 
-# Load overlay image (with transparency)
-overlay_img = cv2.imread(overlay_image_path, cv2.IMREAD_UNCHANGED)
-
-if overlay_img is None:
-    raise FileNotFoundError(f"Failed to load overlay image: {overlay_image_path}")
-
-if overlay_img.shape[2] != 4:
-    raise ValueError("The overlay image must have an alpha channel (i.e., be a PNG with transparency).")
+# Load overlay image (with transparency); premultiplied once, not per frame
+overlay = load_overlay(overlay_image_path)
 
 # Open the video
 cap = cv2.VideoCapture(input_video)
@@ -31,53 +32,20 @@ frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 fps = cap.get(cv2.CAP_PROP_FPS)
 
-# Create VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video, fourcc, fps, (frame_width, frame_height))
-
-frame_idx = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+out = FFmpegFrameSink(output_video, fps, frame_width, frame_height, audio_source=input_video,
+                      codec='libx264', crf=20, preset='medium', threads=None)
 
+def overlay_png(frame, frame_idx):
     current_time = frame_idx / fps
 
     # Only overlay image during specified time range
     if start_time <= current_time <= end_time:
-        img_h, img_w = overlay_img.shape[:2]
-        x, y = position
-
-        # Clamp position to stay within the video frame
-        x = max(0, min(x, frame_width - img_w))
-        y = max(0, min(y, frame_height - img_h))
-
-        roi = frame[y:y+img_h, x:x+img_w]
-
-        # Ensure ROI and overlay image have the same size
-        if roi.shape[0] != overlay_img.shape[0] or roi.shape[1] != overlay_img.shape[1]:
-            # Resize overlay to fit ROI (or vice versa)
-            overlay_resized = cv2.resize(overlay_img, (roi.shape[1], roi.shape[0]))
-        else:
-            overlay_resized = overlay_img
-
-        overlay_bgr = overlay_resized[:, :, :3]
-        overlay_alpha = overlay_resized[:, :, 3]
-
-        # Normalize alpha to [0, 1]
-        alpha_mask = overlay_alpha.astype(np.float32) / 255.0
-        alpha_inv = 1.0 - alpha_mask
-
-        # Blend each color channel separately
-        for c in range(3):
-            roi[:, :, c] = (alpha_mask * overlay_bgr[:, :, c] + alpha_inv * roi[:, :, c])
+        overlay.draw(frame, position)
 
-        # Replace ROI in original frame
-        frame[y:y+img_h, x:x+img_w] = roi
+    return frame
 
-    # Write the frame to output video
-    out.write(frame)
-    frame_idx += 1
+# Decode, overlay and encode on separate threads; frames are written in order
+run_frame_pipeline(read_video_frames(cap), overlay_png, out)
 
 # Release resources
 cap.release()
@@ -1,11 +1,19 @@
 import cv2
-import numpy as np
 import os
+import sys
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from curve_overlay import CurveSequence
+from overlay_sequence import open_overlay_sequence
 
 # File paths
 input_video = "input.mp4"
 output_video = "output.mp4"
-overlay_folder = "frames/"  # Folder containing all PNGs
+overlay_folder = "frames/"  # Folder containing all PNGs, or an atlas built by overlay_sequence.py
+# overlay_folder = None     # Draw the sine wave of app_1_add_PNGs_sinos.py directly, without PNGs
 
 # Timing and position
 start_time = 2.0    # seconds
@@ -23,29 +31,18 @@ frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 fps = cap.get(cv2.CAP_PROP_FPS)
 frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
-# Create VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video, fourcc, fps, (frame_width, frame_height))
-
-# Load list of overlay images
-overlay_files = sorted(
-    [f for f in os.listdir(overlay_folder) if f.endswith('.png')],
-    key=lambda x: int(x[6:-4])  # Extract number from 'frame_XXXX.png'
-)
-overlay_images = [cv2.imread(os.path.join(overlay_folder, f), cv2.IMREAD_UNCHANGED) for f in overlay_files]
-
-for img in overlay_images:
-    if img.shape[2] != 4:
-        raise ValueError("All overlay images must have an alpha channel.")
+out = FFmpegFrameSink(output_video, fps, frame_width, frame_height, audio_source=input_video,
+                      codec='libx264', crf=20, preset='medium', threads=None)
 
-total_overlay_frames = len(overlay_images)
+# Overlay frames are decoded (or drawn) on demand, with a bounded cache
+if overlay_folder is None:
+    overlays = CurveSequence(600, 200, 100, wave='sine', phase_step=0.1, periods=2, color=(255, 0, 0))
+else:
+    overlays = open_overlay_sequence(overlay_folder)
 
-frame_idx = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+total_overlay_frames = len(overlays)
 
+def overlay_animation(frame, frame_idx):
     current_time = frame_idx / fps
 
     # Only overlay animation during specified time range
@@ -58,43 +55,17 @@ while cap.isOpened():
         # Clamp index to valid range
         frame_in_animation = min(frame_in_animation, total_overlay_frames - 1)
 
-        overlay_img = overlay_images[frame_in_animation]
-        img_h, img_w = overlay_img.shape[:2]
-        x, y = position
-
-        # Clamp position to stay within the video frame
-        x = max(0, min(x, frame_width - img_w))
-        y = max(0, min(y, frame_height - img_h))
-
-        roi = frame[y:y+img_h, x:x+img_w]
-
-        # Resize overlay if needed
-        if roi.shape[0] != overlay_img.shape[0] or roi.shape[1] != overlay_img.shape[1]:
-            overlay_resized = cv2.resize(overlay_img, (roi.shape[1], roi.shape[0]))
-        else:
-            overlay_resized = overlay_img
-
-        overlay_bgr = overlay_resized[:, :, :3]
-        overlay_alpha = overlay_resized[:, :, 3]
-
-        # Normalize alpha to [0, 1]
-        alpha_mask = overlay_alpha.astype(np.float32) / 255.0
-        alpha_inv = 1.0 - alpha_mask
-
-        # Blend each color channel separately
-        for c in range(3):
-            roi[:, :, c] = (alpha_mask * overlay_bgr[:, :, c] + alpha_inv * roi[:, :, c])
+        overlays[frame_in_animation].draw(frame, position)
 
-        # Replace ROI in original frame
-        frame[y:y+img_h, x:x+img_w] = roi
+    return frame
 
-    # Write the frame to output video
-    out.write(frame)
-    frame_idx += 1
+# Decode, overlay and encode on separate threads; frames are written in order
+run_frame_pipeline(read_video_frames(cap), overlay_animation, out)
 
 # Release resources
 cap.release()
 out.release()
+overlays.close()
 cv2.destroyAllWindows()
 
 print("Animated overlay applied successfully.")
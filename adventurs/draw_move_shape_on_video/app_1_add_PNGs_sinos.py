@@ -1,27 +1,24 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import cv2
 import os
+import sys
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from curve_overlay import CurveSequence
 
 # Create output directory
 output_dir = "frames"
 os.makedirs(output_dir, exist_ok=True)
 
-# Parameters
+# Parameters: a 600x200 blue sine wave over two periods, phase +0.1 per frame
 num_frames = 100
-x = np.linspace(0, 4 * np.pi, 1000)
+curve = CurveSequence(600, 200, num_frames, wave='sine', phase_step=0.1, periods=2,
+                      color=(255, 0, 0), thickness=2, y_range=(-1.5, 1.5))
 
-# Generate frames
+# Generate frames (rasterized directly, no plotting)
+# The movable overlay script can also use a CurveSequence directly, without these PNGs
 for i in range(num_frames):
-    phase = i * 0.1
-    y = np.sin(x + phase)
-
-    plt.figure(figsize=(6, 2))
-    plt.plot(x, y, color='blue')  # Change color if background is not black
-    plt.ylim(-1.5, 1.5)
-    plt.axis('off')  # Hide axes
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/frame_{i:04d}.png", dpi=100, transparent=True)
-    plt.close()
+    cv2.imwrite(f"{output_dir}/frame_{i:04d}.png", curve.render(i))
 
 print("Frames generated.")
 
@@ -1,4 +1,13 @@
 import cv2
+import os
+import sys
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_layer import EventLayer
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from timeline import EventTimeline, load_events
 
 # Input and output file paths
 input_video = 'input.mp4'
@@ -35,6 +44,14 @@ shape_events = [
     }
 ]
 
+# Or load the events from a file (.json, .jsonl or .csv with the same keys)
+events_file = None
+if events_file:
+    shape_events = load_events(events_file)
+
+# Index the events so each frame only looks at the active ones
+timeline = EventTimeline(shape_events)
+
 # Open the video
 cap = cv2.VideoCapture(input_video)
 
@@ -43,50 +60,45 @@ frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 fps = cap.get(cv2.CAP_PROP_FPS)
 
-# Create VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video, fourcc, fps, (frame_width, frame_height))
+out = FFmpegFrameSink(output_video, fps, frame_width, frame_height, audio_source=input_video,
+                      codec='libx264', crf=20, preset='medium', threads=None)
 
-frame_idx = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+def draw_shape(frame, event):
+    shape_type = event["type"]
+    if shape_type == "rectangle":
+        cv2.rectangle(
+            frame,
+            event["start_point"],
+            event["end_point"],
+            event["color"],
+            event["thickness"]
+        )
+    elif shape_type == "circle":
+        cv2.circle(
+            frame,
+            event["center"],
+            event["radius"],
+            event["color"],
+            event["thickness"]
+        )
+    elif shape_type == "line":
+        cv2.line(
+            frame,
+            event["start_point"],
+            event["end_point"],
+            event["color"],
+            event["thickness"]
+        )
 
-    current_time = frame_idx / fps
+# The active shapes are drawn together into one layer, rebuilt only when they change
+shape_layer = EventLayer(timeline, draw_shape, frame_width, frame_height)
 
-    # Loop through all shape events and draw if active
-    for event in shape_events:
-        if event["start_time"] <= current_time <= event["end_time"]:
-            shape_type = event["type"]
-            if shape_type == "rectangle":
-                cv2.rectangle(
-                    frame,
-                    event["start_point"],
-                    event["end_point"],
-                    event["color"],
-                    event["thickness"]
-                )
-            elif shape_type == "circle":
-                cv2.circle(
-                    frame,
-                    event["center"],
-                    event["radius"],
-                    event["color"],
-                    event["thickness"]
-                )
-            elif shape_type == "line":
-                cv2.line(
-                    frame,
-                    event["start_point"],
-                    event["end_point"],
-                    event["color"],
-                    event["thickness"]
-                )
+def draw_shapes(frame, frame_idx):
+    current_time = frame_idx / fps
+    return shape_layer.draw(frame, current_time)
 
-    # Write the frame to output video
-    out.write(frame)
-    frame_idx += 1
+# Decode, draw and encode on separate threads; frames are written in order
+run_frame_pipeline(read_video_frames(cap), draw_shapes, out)
 
 # Release resources
 cap.release()
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from overlay_blend import Overlay
+
+# (frame width, frame height, overlay width, overlay height)
+CASES = [
+    (1920, 1080, 400, 400),
+    (1920, 1080, 1920, 1080),
+    (3840, 2160, 800, 800),
+    (3840, 2160, 3840, 2160),
+]
+
+
+def blend_float_loop(frame, overlay_img, position):
+    """The per-channel float32 blend the overlay scripts used to run on every frame."""
+    frame_height, frame_width = frame.shape[:2]
+    img_h, img_w = overlay_img.shape[:2]
+    x, y = position
+
+    x = max(0, min(x, frame_width - img_w))
+    y = max(0, min(y, frame_height - img_h))
+
+    roi = frame[y:y+img_h, x:x+img_w]
+
+    overlay_bgr = overlay_img[:, :, :3]
+    overlay_alpha = overlay_img[:, :, 3]
+
+    alpha_mask = overlay_alpha.astype(np.float32) / 255.0
+    alpha_inv = 1.0 - alpha_mask
+
+    for c in range(3):
+        roi[:, :, c] = (alpha_mask * overlay_bgr[:, :, c] + alpha_inv * roi[:, :, c])
+
+    frame[y:y+img_h, x:x+img_w] = roi
+    return frame
+
+
+def make_overlay(width, height, rng):
+    """A random BGRA overlay with a soft-edged alpha, like an anti-aliased sprite."""
+    overlay_img = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[0:height, 0:width]
+    distance = np.hypot((xx - width / 2) / (width / 2), (yy - height / 2) / (height / 2))
+    overlay_img[:, :, 3] = np.clip((1.2 - distance) * 255, 0, 255).astype(np.uint8)
+    return overlay_img
+
+
+def time_per_frame(blend, frame, iterations):
+    """Average milliseconds per call of blend(frame)."""
+    blend(frame)  # warm-up (caches, scratch buffers)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        blend(frame)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run_benchmark(iterations=50):
+    """
+    Compare the float32 per-channel loop with the premultiplied uint16 kernel.
+
+    Args:
+        iterations (int): Blends timed per case
+
+    Returns:
+        list: (case, float loop ms, uint16 kernel ms, max pixel difference) tuples
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for frame_width, frame_height, overlay_width, overlay_height in CASES:
+        frame = rng.integers(0, 256, (frame_height, frame_width, 3), dtype=np.uint8)
+        overlay_img = make_overlay(overlay_width, overlay_height, rng)
+        overlay = Overlay(overlay_img)
+        position = (100, 100)
+
+        # Both kernels must produce the same picture (up to rounding)
+        expected = blend_float_loop(frame.copy(), overlay_img, position)
+        actual = overlay.draw(frame.copy(), position)
+        difference = int(np.abs(expected.astype(np.int16) - actual).max())
+
+        loop_ms = time_per_frame(lambda f: blend_float_loop(f, overlay_img, position), frame.copy(), iterations)
+        kernel_ms = time_per_frame(lambda f: overlay.draw(f, position), frame.copy(), iterations)
+
+        case = f"{frame_width}x{frame_height} frame, {overlay_width}x{overlay_height} overlay"
+        results.append((case, loop_ms, kernel_ms, difference))
+    return results
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    for case, loop_ms, kernel_ms, difference in run_benchmark(iterations):
+        print(f"{case}: float loop {loop_ms:.2f} ms, uint16 kernel {kernel_ms:.2f} ms "
+              f"({loop_ms / kernel_ms:.1f}x), max difference {difference}")
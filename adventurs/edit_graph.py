@@ -0,0 +1,345 @@
+import ffmpeg
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from bisect import bisect_left
+from collections import namedtuple
+
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import CONTAINER_CODECS, get_frame_tolerance, get_keyframe_times, time_to_seconds
+from vision_4_script_name import get_keep_segments
+
+# A piece of the output timeline: [start, end) seconds of a source file
+Segment = namedtuple('Segment', ['source', 'start', 'end'])
+
+# How an edit is rendered ("copy" or "filter"), the pieces and why
+EditPlan = namedtuple('EditPlan', ['method', 'segments', 'reason'])
+
+# Encoding used by the filter plan when the edit has no resize step
+DEFAULT_ENCODING = {'crf': 18, 'preset': 'medium'}
+
+
+def _duration(path):
+    return float(probe_video(path)['format']['duration'])
+
+
+def _take(segments, start, end):
+    """Cut the timeline [start, end) seconds out of a list of segments."""
+    taken = []
+    position = 0.0
+    for segment in segments:
+        length = segment.end - segment.start
+        lo = max(start, position)
+        hi = min(end, position + length)
+        if hi > lo:
+            taken.append(Segment(segment.source, segment.start + lo - position, segment.start + hi - position))
+        position += length
+    return taken
+
+
+class EditGraph:
+    """
+    Declarative chain of edits, compiled into a single ffmpeg run.
+
+    Each step (slice, cut, insert) only rewrites a list of source segments,
+    so nothing is decoded until the whole chain is known. The result is then
+    rendered in one pass: stream copy through the concat demuxer when that is
+    legal, otherwise one filter graph with one decode of each source and one
+    encode. No intermediate files, no generational quality loss.
+
+    Example:
+        EditGraph("input.mp4").slice("00:01:00", "00:05:00") \\
+            .cut(("00:00:10", "00:00:20")).insert("clip.mp4", 30) \\
+            .resize("1280:-2").run("output.mp4")
+    """
+
+    def __init__(self, input_file):
+        """
+        Args:
+            input_file (str): Path to the main video
+        """
+        self.input_file = input_file
+        self.segments = [Segment(input_file, 0.0, _duration(input_file))]
+        self.scale = None
+        self.encoding = dict(DEFAULT_ENCODING)
+        self.resized = False
+
+    @property
+    def duration(self):
+        return sum(segment.end - segment.start for segment in self.segments)
+
+    def slice(self, start_time, end_time):
+        """Keep only [start_time, end_time) of the current timeline (like slice_video)."""
+        self.segments = _take(self.segments, time_to_seconds(start_time), time_to_seconds(end_time))
+        return self
+
+    def cut(self, *cut_ranges):
+        """Remove (start, end) ranges of the current timeline (like cut_and_concat_video)."""
+        total = self.duration
+        kept = []
+        for start, end in get_keep_segments(cut_ranges, total):
+            kept += _take(self.segments, start, total if end is None else end)
+        self.segments = kept
+        return self
+
+    def insert(self, insert_file, insert_time):
+        """Insert a whole clip at a time of the current timeline (like insert_video_at_time)."""
+        position = time_to_seconds(insert_time)
+        clip = Segment(insert_file, 0.0, _duration(insert_file))
+        self.segments = _take(self.segments, 0.0, position) + [clip] + _take(self.segments, position, self.duration)
+        return self
+
+    def resize(self, scale=None, crf=28, preset='slow'):
+        """
+        Scale and compress the result (like the resize notebook); always re-encodes.
+
+        `scale` is "W:H" (e.g. "1280:-2") or a (width, height) tuple.
+        """
+        self.scale = scale
+        self.encoding = {'crf': crf, 'preset': preset}
+        self.resized = True
+        return self
+
+    def compile(self, output_file):
+        """
+        Decide how the edit is rendered.
+
+        Stream copy is legal when no step changes the pictures (no resize),
+        every segment comes from the main video, the codecs fit the output
+        container and every segment starts on a keyframe. Anything else is
+        rendered by one filter graph.
+
+        Args:
+            output_file (str): Path of the output video (its container matters)
+
+        Returns:
+            EditPlan: The method, the segments and the reason
+        """
+        if not self.segments:
+            raise ValueError("The edit leaves nothing of the video")
+        if self.resized:
+            return EditPlan('filter', self.segments, "the pictures are resized")
+        if any(segment.source != self.input_file for segment in self.segments):
+            return EditPlan('filter', self.segments, "segments come from several files")
+
+        probe = probe_video(self.input_file)
+        video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        allowed = CONTAINER_CODECS.get(os.path.splitext(output_file)[1].lower())
+        if allowed is not None and any(
+            s['codec_name'] not in allowed for s in probe['streams'] if s['codec_type'] in ('video', 'audio')
+        ):
+            return EditPlan('filter', self.segments, "codecs not supported by the output container")
+
+        if video_stream is not None:
+            offset = float(probe['format'].get('start_time', 0) or 0)
+            keyframes = [t - offset for t in get_keyframe_times(self.input_file, get_packet_index(self.input_file))]
+            epsilon = get_frame_tolerance(video_stream)
+            for segment in self.segments:
+                i = bisect_left(keyframes, segment.start - epsilon)
+                if segment.start > epsilon and not (i < len(keyframes) and keyframes[i] <= segment.start + epsilon):
+                    return EditPlan('filter', self.segments, f"a segment starts between keyframes ({segment.start:.3f}s)")
+
+        return EditPlan('copy', self.segments, "every segment starts on a keyframe of the main video")
+
+    def run(self, output_file):
+        """
+        Render the edit in one pass.
+
+        Args:
+            output_file (str): Path to save the output video
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            plan = self.compile(output_file)
+            print(f"{len(plan.segments)} segment(s), {plan.method}: {plan.reason}")
+            if plan.method == 'copy':
+                render_copy(plan.segments, output_file)
+            else:
+                render_filter_graph(plan.segments, output_file, self.input_file, self.scale, self.encoding)
+        except ffmpeg.Error as e:
+            error_msg = e.stderr.decode('utf8') if hasattr(e, 'stderr') and e.stderr else str(e)
+            print(f"Error during processing: {error_msg}")
+            return False
+        except subprocess.CalledProcessError as e:
+            print(f"Error during processing: {e.stderr}")
+            return False
+        except Exception as e:
+            print(f"An unexpected error occurred: {str(e)}")
+            return False
+
+        print(f"Successfully created {output_file}")
+        return True
+
+
+def render_copy(segments, output_file):
+    """Join segments of one file by stream copy, reading them straight from the source."""
+    probe = probe_video(segments[0].source)
+    offset = float(probe['format'].get('start_time', 0) or 0)
+    duration = float(probe['format']['duration'])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        concat_list = os.path.join(temp_dir, "concat_list.txt")
+        with open(concat_list, 'w') as f:
+            for segment in segments:
+                f.write(f"file '{os.path.abspath(segment.source)}'\n")
+                if segment.start > 0:
+                    f.write(f"inpoint {segment.start + offset:.6f}\n")
+                if segment.end < duration:
+                    f.write(f"outpoint {segment.end + offset:.6f}\n")
+
+        cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_list, '-c', 'copy', output_file]
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def parse_scale(scale):
+    """
+    Split a scale size into width and height.
+
+    Args:
+        scale (str|tuple): "W:H" (e.g. "1280:-2") or a (width, height) tuple
+
+    Returns:
+        tuple: (width, height) as given, e.g. ('1280', '-2')
+    """
+    if isinstance(scale, str):
+        width, separator, height = scale.partition(':')
+        if not separator:
+            raise ValueError(f"Invalid scale '{scale}', expected \"W:H\"")
+        return width, height
+    width, height = scale
+    return width, height
+
+
+def render_filter_graph(segments, output_file, main_file, scale=None, encoding=DEFAULT_ENCODING):
+    """
+    Render segments of one or more files with one filter graph and one encode.
+
+    Every source is opened once, input-seeked to its earliest segment so
+    nothing before it is decoded; each segment is trimmed from it, clips
+    from other files are conformed to the main video (size, aspect, frame
+    rate, audio format) and all segments are concatenated, then optionally
+    scaled.
+    """
+    probe = probe_video(main_file)
+    video_stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+    audio_stream = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+    width, height = video_stream['width'], video_stream['height']
+    frame_rate = video_stream.get('avg_frame_rate')
+    if frame_rate in (None, '0/0'):
+        frame_rate = video_stream['r_frame_rate']
+    sample_rate = audio_stream['sample_rate'] if audio_stream else None
+    layout = (audio_stream.get('channel_layout') or 'stereo') if audio_stream else None
+
+    # ffmpeg-python escapes ':' in filter arguments, so the SAR goes in as a ratio
+    sar = video_stream.get('sample_aspect_ratio', '1:1')
+    sar = '1/1' if sar in ('0:1', 'N/A') else sar.replace(':', '/')
+
+    # Seek each source to its earliest segment so nothing before it is decoded
+    seeks = {}
+    for segment in segments:
+        seeks[segment.source] = min(seeks.get(segment.source, segment.start), segment.start)
+    inputs = {
+        source: ffmpeg.input(source, ss=f"{seek:.6f}") if seek > 0 else ffmpeg.input(source)
+        for source, seek in seeks.items()
+    }
+
+    parts = []
+    for segment in segments:
+        source = inputs[segment.source]
+        start = segment.start - seeks[segment.source]
+        end = segment.end - seeks[segment.source]
+
+        video = source.video.trim(start=start, end=end).setpts('PTS-STARTPTS')
+        if segment.source != main_file:
+            video = (
+                video
+                .filter('scale', width, height, force_original_aspect_ratio='decrease')
+                .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')
+                .filter('setsar', sar)
+                .filter('fps', frame_rate)
+            )
+        parts.append(video)
+
+        if audio_stream is not None:
+            has_audio = any(s['codec_type'] == 'audio' for s in probe_video(segment.source)['streams'])
+            if has_audio:
+                audio = (
+                    source.audio
+                    .filter('atrim', start=start, end=end)
+                    .filter('asetpts', 'PTS-STARTPTS')
+                )
+            else:
+                # Silent track so every segment has the same streams
+                audio = ffmpeg.input(
+                    f"anullsrc=r={sample_rate}:cl={layout}", f='lavfi', t=f"{segment.end - segment.start:.6f}"
+                ).audio
+            parts.append(audio.filter('aformat', sample_rates=sample_rate, channel_layouts=layout))
+
+    joined = ffmpeg.concat(*parts, v=1, a=1 if audio_stream is not None else 0).node
+    video = joined[0]
+    if scale:
+        scale_width, scale_height = parse_scale(scale)
+        video = video.filter('scale', w=scale_width, h=scale_height)
+
+    streams = [video] + ([joined[1]] if audio_stream is not None else [])
+    output_args = {'vcodec': 'libx264', 'crf': encoding['crf'], 'preset': encoding['preset'], 'pix_fmt': 'yuv420p'}
+    if audio_stream is not None:
+        output_args.update(acodec='aac', audio_bitrate='192k')
+
+    ffmpeg.output(*streams, output_file, **output_args).global_args('-y').run(capture_stderr=True)
+
+
+def load_edit(edit_file):
+    """
+    Build an EditGraph from a JSON edit description.
+
+    Example:
+        {
+          "input": "input.mp4",
+          "output": "output.mp4",
+          "steps": [
+            {"op": "slice", "start": "00:01:00", "end": "00:05:00"},
+            {"op": "cut", "ranges": [["00:00:10", "00:00:20"]]},
+            {"op": "insert", "file": "clip.mp4", "at": "00:00:30"},
+            {"op": "resize", "scale": "1280:-2", "crf": 28, "preset": "slow"}
+          ]
+        }
+
+    Args:
+        edit_file (str): Path to the JSON file
+
+    Returns:
+        tuple: (EditGraph, output path)
+    """
+    with open(edit_file) as f:
+        edit = json.load(f)
+
+    graph = EditGraph(edit["input"])
+    for step in edit.get("steps", []):
+        op = step["op"]
+        if op == "slice":
+            graph.slice(step["start"], step["end"])
+        elif op == "cut":
+            graph.cut(*[tuple(r) for r in step["ranges"]])
+        elif op == "insert":
+            graph.insert(step["file"], step["at"])
+        elif op == "resize":
+            graph.resize(step.get("scale"), step.get("crf", 28), step.get("preset", 'slow'))
+        else:
+            raise ValueError(f"Unknown edit step '{op}'")
+    return graph, edit.get("output", "output.mp4")
+
+
+if __name__ == "__main__":
+    # Example usage: python edit_graph.py edit.json
+    edit_file = sys.argv[1] if len(sys.argv) > 1 else "edit.json"
+
+    graph, output_file = load_edit(edit_file)
+    if graph.run(output_file):
+        print("Edit completed successfully!")
+    else:
+        print("Edit failed.")
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from overlay_blend import PreparedOverlay
+
+# Layers kept per EventLayer; a few, because pipeline workers near an event
+# boundary can ask for the sets on both sides of it at the same time
+CACHE_SIZE = 4
+
+
+def render_layer(events, draw_event, width, height):
+    """
+    Render static events once into a transparent BGRA layer.
+
+    The events are drawn with their usual BGR drawing code twice, onto a
+    black and onto a white canvas. Where they are opaque both canvases get
+    the same color; where they are transparent or antialiased the two
+    differ, and the difference is exactly 1 - alpha. So any drawing code
+    (cv2 shapes, putText, sprites) can be turned into a layer unchanged.
+
+    Args:
+        events (list): Events to draw, bottom to top
+        draw_event (callable): draw_event(frame, event) drawing onto a BGR frame
+        width (int): Width of the layer in pixels
+        height (int): Height of the layer in pixels
+
+    Returns:
+        numpy.ndarray: BGRA uint8 image of shape (height, width, 4)
+    """
+    black = np.zeros((height, width, 3), dtype=np.uint8)
+    white = np.full((height, width, 3), 255, dtype=np.uint8)
+    for event in events:
+        draw_event(black, event)
+        draw_event(white, event)
+
+    # On black the result is color * alpha; on white, color * alpha + 255 * (1 - alpha)
+    inverse_alpha = (white.astype(np.int16) - black).max(axis=2).clip(0, 255)
+    alpha = (255 - inverse_alpha).astype(np.uint16)
+
+    layer = np.zeros((height, width, 4), dtype=np.uint8)
+    visible = alpha > 0
+    layer[visible, :3] = np.minimum(
+        (black[visible].astype(np.uint16) * 255 + alpha[visible, None] // 2) // alpha[visible, None], 255
+    )
+    layer[:, :, 3] = alpha
+    return layer
+
+
+class EventLayer:
+    """
+    Draws timed static events (shapes, text) through one cached layer.
+
+    The active events only change at event boundaries, so they are rendered
+    together into a layer that is rebuilt only when the active set changes.
+    Every frame then costs a single blend of the layer's bounding box, however
+    many events are active.
+    """
+
+    def __init__(self, timeline, draw_event, width, height, cache_size=CACHE_SIZE):
+        """
+        Args:
+            timeline (EventTimeline): Index of the events
+            draw_event (callable): draw_event(frame, event) drawing one event onto a BGR frame
+            width (int): Frame width in pixels
+            height (int): Frame height in pixels
+            cache_size (int): Layers (active sets) kept in memory
+        """
+        self.timeline = timeline
+        self.draw_event = draw_event
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        self._layers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def layer(self, time):
+        """
+        Get the prepared layer of the events active at a time.
+
+        Args:
+            time (float): Time in seconds
+
+        Returns:
+            PreparedOverlay: The layer, or None if no event is active
+        """
+        events = self.timeline.active(time)
+        if not events:
+            return None
+        key = tuple(id(event) for event in events)
+
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                return layer
+
+            layer = PreparedOverlay(render_layer(events, self.draw_event, self.width, self.height))
+            self._layers[key] = layer
+            while len(self._layers) > self.cache_size:
+                self._layers.popitem(last=False)
+        return layer
+
+    def draw(self, frame, time):
+        """
+        Blend the events active at a time onto a frame, in place.
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            time (float): Time of the frame in seconds
+
+        Returns:
+            numpy.ndarray: The same frame
+        """
+        layer = self.layer(time)
+        if layer is not None:
+            layer.blend_at(frame, 0, 0)
+        return frame
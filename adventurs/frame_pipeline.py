@@ -0,0 +1,122 @@
+import os
+import queue
+import threading
+
+# Marker a worker puts on the result queue when it has no more input
+_WORKER_DONE = object()
+
+
+def read_video_frames(cap):
+    """
+    Yield the frames of an opened cv2.VideoCapture until it runs out.
+
+    Args:
+        cap (cv2.VideoCapture): Opened video capture
+
+    Yields:
+        numpy.ndarray: BGR frames
+    """
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+
+
+def run_frame_pipeline(frames, process_frame, writer, workers=None, max_in_flight=None):
+    """
+    Decode, process and encode frames concurrently, keeping their order.
+
+    A reader thread pulls frames from `frames`, a pool of worker threads runs
+    `process_frame` on them, and the calling thread writes the results to
+    `writer` in the original order. OpenCV and NumPy release the GIL, so
+    decoding, processing and encoding overlap on multicore hosts.
+
+    At most `max_in_flight` frames are decoded but not yet written; when the
+    writer falls behind, the reader blocks (backpressure), so memory stays
+    bounded no matter how long the video is.
+
+    `process_frame` is called from several threads at once: it must not keep
+    per-frame state in shared variables (use threading.local for scratch
+    buffers) and may modify and return the frame it is given.
+
+    Args:
+        frames (iterable): Source of frames, e.g. read_video_frames(cap)
+        process_frame (callable): process_frame(frame, frame_idx) -> frame
+        writer: Object with a write(frame) method, e.g. cv2.VideoWriter
+        workers (int): Number of processing threads (defaults to the CPU count)
+        max_in_flight (int): Bound on frames held in the pipeline
+            (defaults to 4 per worker)
+
+    Returns:
+        int: Number of frames written
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+
+    slots = threading.Semaphore(max_in_flight)
+    tasks = queue.Queue()
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def reader():
+        try:
+            for frame_idx, frame in enumerate(frames):
+                # Wait for the writer to free a slot, unless the pipeline stops
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                tasks.put((frame_idx, frame))
+        except Exception as e:
+            results.put((None, None, e))
+        finally:
+            for _ in range(workers):
+                tasks.put(None)
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is None:
+                results.put(_WORKER_DONE)
+                return
+            if stop.is_set():
+                continue
+            frame_idx, frame = task
+            try:
+                results.put((frame_idx, process_frame(frame, frame_idx), None))
+            except Exception as e:
+                results.put((frame_idx, None, e))
+
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # Ordered writer: hold results that arrive early until their turn
+    pending = {}
+    next_idx = 0
+    finished_workers = 0
+    try:
+        while finished_workers < workers:
+            result = results.get()
+            if result is _WORKER_DONE:
+                finished_workers += 1
+                continue
+
+            frame_idx, frame, error = result
+            if error is not None:
+                raise error
+
+            pending[frame_idx] = frame
+            while next_idx in pending:
+                writer.write(pending.pop(next_idx))
+                next_idx += 1
+                slots.release()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return next_idx
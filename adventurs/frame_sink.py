@@ -0,0 +1,122 @@
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+from video_probe import probe_video
+from vision_1_video_slicer import CONTAINER_CODECS
+
+# Video encoders the sink can be configured with
+VIDEO_ENCODERS = {'libx264', 'libx265'}
+
+
+class FFmpegFrameSink:
+    """
+    Drop-in replacement for cv2.VideoWriter that pipes raw BGR frames into ffmpeg.
+
+    Frames are encoded with x264 or x265 instead of MPEG-4 Part 2, and the
+    audio of a source file is muxed in by the same ffmpeg process: stream
+    copied if the output container can hold it, otherwise encoded to AAC.
+    One pass writes the final file.
+
+    The audio is bounded by the video length of its source rather than with
+    -shortest, which drops the last video frame even when audio and video
+    are exactly as long.
+    """
+
+    def __init__(self, output_path, fps, width, height, audio_source=None, codec='libx264',
+                 crf=None, preset=None, threads=None, pix_fmt='yuv420p', video_args=None):
+        """
+        Args:
+            output_path (str): Path to save the output video
+            fps (float|str): Frame rate, e.g. 30, 29.97 or "30000/1001"
+            width (int): Frame width in pixels
+            height (int): Frame height in pixels
+            audio_source (str): File whose first audio track is added to the output
+            codec (str): 'libx264' or 'libx265'
+            crf (int): Quality (lower is better); the encoder default if None
+            preset (str): Encoder preset, e.g. 'fast', 'medium', 'slow'
+            threads (int): Encoder threads; ffmpeg picks if None
+            pix_fmt (str): Output pixel format
+            video_args (list): Full ffmpeg video encoding arguments, used
+                instead of codec/crf/preset/pix_fmt (e.g. to match a source stream)
+        """
+        if video_args is None and codec not in VIDEO_ENCODERS:
+            raise ValueError(f"Unsupported codec '{codec}', expected one of: {', '.join(sorted(VIDEO_ENCODERS))}")
+
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-'
+        ]
+
+        if audio_source:
+            # Copy the audio if the output container can hold it, else re-encode
+            probe = probe_video(audio_source)
+            audio = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+            allowed = CONTAINER_CODECS.get(os.path.splitext(output_path)[1].lower())
+            audio_codec = 'copy' if audio and allowed and audio['codec_name'] in allowed else 'aac'
+
+            # Keep no more audio than the source has video: the frames written are that video
+            video = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+            duration = (video or {}).get('duration') or probe['format'].get('duration')
+            if duration not in (None, 'N/A'):
+                cmd += ['-t', f"{float(duration):.6f}"]
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a:0?', '-c:a', audio_codec]
+
+        if video_args is None:
+            video_args = ['-c:v', codec, '-pix_fmt', pix_fmt]
+            if crf is not None:
+                video_args += ['-crf', str(crf)]
+            if preset:
+                video_args += ['-preset', preset]
+            if codec == 'libx265':
+                # Tag HEVC so QuickTime/Safari play it from mp4/mov
+                video_args += ['-tag:v', 'hvc1']
+        if threads:
+            video_args = video_args + ['-threads', str(threads)]
+
+        cmd += video_args + [output_path]
+
+        # stderr goes to a file so a chatty ffmpeg can never block the pipe
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self.log)
+
+    def isOpened(self):
+        """True while ffmpeg is running, like cv2.VideoWriter.isOpened."""
+        return self.process.poll() is None
+
+    def write(self, frame):
+        """
+        Encode one BGR frame.
+
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg has exited (with its error output)
+        """
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.release()
+            raise
+
+    def release(self):
+        """
+        Finish the file and wait for ffmpeg.
+
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg failed (with its error output)
+        """
+        if self.log.closed:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.process.wait()
+        self.log.seek(0)
+        stderr = self.log.read().decode('utf8', errors='replace')
+        self.log.close()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, self.process.args, stderr=stderr)
@@ -0,0 +1,180 @@
+import threading
+
+import cv2
+import numpy as np
+
+# Per-thread uint16 scratch buffers, so blends can run on pipeline workers
+_scratch = threading.local()
+
+
+def _scratch_buffers(shape):
+    """
+    Two uint16 scratch arrays of `shape` for the calling thread.
+
+    Each thread keeps one flat buffer, grown to the largest region seen, and
+    hands out views of its start: regions of many different sizes (text
+    sprites, clipped overlays) share it instead of piling up arrays.
+    """
+    size = int(np.prod(shape))
+    flat = getattr(_scratch, 'flat', None)
+    if flat is None or len(flat) < 2 * size:
+        flat = _scratch.flat = np.empty(2 * size, dtype=np.uint16)
+    return flat[:size].reshape(shape), flat[size:2 * size].reshape(shape)
+
+
+def blend_premultiplied(roi, premultiplied, inverse_alpha):
+    """
+    Blend a premultiplied overlay onto a BGR region, in place.
+
+    All channels are blended at once with fixed-point uint16 math:
+    out = (roi * (255 - alpha) + color * alpha) / 255, rounded. The weighted
+    sum is at most 255 * 255, so the rounding steps never overflow uint16.
+
+    Args:
+        roi (numpy.ndarray): uint8 BGR region of the frame (a view is fine)
+        premultiplied (numpy.ndarray): uint16 color * alpha, same shape as roi
+        inverse_alpha (numpy.ndarray): uint16 255 - alpha, shape (h, w, 1)
+    """
+    scratch, carry = _scratch_buffers(roi.shape)
+    np.multiply(roi, inverse_alpha, out=scratch)
+    scratch += premultiplied
+    # Exact rounded division by 255: (x + 128 + ((x + 128) >> 8)) >> 8
+    scratch += 128
+    np.right_shift(scratch, 8, out=carry)
+    scratch += carry
+    scratch >>= 8
+    np.copyto(roi, scratch, casting='unsafe')
+
+
+class PreparedOverlay:
+    """Premultiplied data of an overlay at one size, cropped to its visible pixels."""
+
+    def __init__(self, image):
+        alpha = image[:, :, 3]
+
+        # Fully transparent borders never change the frame; skip them
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if len(rows) == 0:
+            self.offset = (0, 0)
+            self.premultiplied = None
+            self.inverse_alpha = None
+            return
+
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+        cropped = image[top:bottom, left:right]
+
+        self.offset = (int(left), int(top))
+        alpha = cropped[:, :, 3:4].astype(np.uint16)
+        self.premultiplied = np.ascontiguousarray(cropped[:, :, :3] * alpha)
+        self.inverse_alpha = np.ascontiguousarray(255 - alpha)
+
+    def blend_onto(self, roi):
+        """Blend onto a region the size of the overlay, in place."""
+        if self.premultiplied is None:
+            return
+        x, y = self.offset
+        h, w = self.premultiplied.shape[:2]
+        blend_premultiplied(roi[y:y+h, x:x+w], self.premultiplied, self.inverse_alpha)
+
+    def blend_at(self, frame, x, y):
+        """Blend with the image's top-left corner at (x, y), clipping what falls outside the frame."""
+        if self.premultiplied is None:
+            return
+        h, w = self.premultiplied.shape[:2]
+        left, top = x + self.offset[0], y + self.offset[1]
+
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + w, frame.shape[1]), min(top + h, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        src = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+        blend_premultiplied(frame[y0:y1, x0:x1], self.premultiplied[src], self.inverse_alpha[src])
+
+
+class Overlay:
+    """
+    A transparent PNG overlay, prepared once and blended onto many frames.
+
+    Premultiplied data is computed once per size; resized variants are
+    cached, so an overlay that has to be shrunk to fit the frame is not
+    resized again on every frame.
+    """
+
+    def __init__(self, image):
+        """
+        Args:
+            image (numpy.ndarray): BGRA image, e.g. from cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        """
+        if image.ndim != 3 or image.shape[2] != 4:
+            raise ValueError("The overlay image must have an alpha channel (i.e., be a PNG with transparency).")
+        self.image = image
+        self.height, self.width = image.shape[:2]
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def prepared(self, width, height):
+        """
+        Get the premultiplied overlay at a given size (cached).
+
+        Args:
+            width (int): Target width in pixels
+            height (int): Target height in pixels
+
+        Returns:
+            PreparedOverlay: The overlay data at that size
+        """
+        key = (width, height)
+        variant = self._variants.get(key)
+        if variant is None:
+            with self._lock:
+                variant = self._variants.get(key)
+                if variant is None:
+                    image = self.image
+                    if key != (self.width, self.height):
+                        image = cv2.resize(image, key)
+                    variant = self._variants[key] = PreparedOverlay(image)
+        return variant
+
+    def draw(self, frame, position):
+        """
+        Blend the overlay onto a frame, in place.
+
+        The position is clamped so the overlay stays within the frame; if the
+        overlay is larger than the frame it is resized to what is left.
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            position (tuple): Top-left corner of the overlay (x, y)
+
+        Returns:
+            numpy.ndarray: The same frame
+        """
+        frame_height, frame_width = frame.shape[:2]
+        x, y = position
+
+        # Clamp position to stay within the video frame
+        x = max(0, min(x, frame_width - self.width))
+        y = max(0, min(y, frame_height - self.height))
+
+        roi = frame[y:y+self.height, x:x+self.width]
+        self.prepared(roi.shape[1], roi.shape[0]).blend_onto(roi)
+        return frame
+
+
+def load_overlay(path):
+    """
+    Load a transparent PNG as an Overlay.
+
+    Args:
+        path (str): Path to a PNG with an alpha channel
+
+    Returns:
+        Overlay: The prepared overlay
+    """
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise FileNotFoundError(f"Failed to load overlay image: {path}")
+    return Overlay(image)
@@ -0,0 +1,221 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from overlay_blend import Overlay
+
+# Prepared overlays kept in memory, and frames decoded ahead of the reader
+CACHE_SIZE = 32
+READ_AHEAD = 8
+
+
+def list_sequence_files(folder):
+    """
+    List the PNG frames of an overlay animation in playback order.
+
+    Files are ordered by the number in their name ('frame_0012.png' -> 12).
+
+    Args:
+        folder (str): Folder containing the PNGs
+
+    Returns:
+        list: Full paths of the PNGs
+    """
+    names = [name for name in os.listdir(folder) if name.lower().endswith('.png')]
+    names.sort(key=lambda name: int((re.findall(r'\d+', name) or ['0'])[-1]))
+    return [os.path.join(folder, name) for name in names]
+
+
+class OverlaySequence:
+    """
+    Frames of an overlay animation, loaded on demand.
+
+    Frames are prepared as Overlay objects (see overlay_blend) and kept in an
+    LRU cache; the frames following the one asked for are decoded ahead on
+    background threads. At most CACHE_SIZE + READ_AHEAD frames are held, so
+    memory stays flat however long the animation is.
+
+    Subclasses implement __len__ and _load(index) -> BGRA numpy array.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, read_ahead=READ_AHEAD):
+        self.cache_size = cache_size
+        self.read_ahead = read_ahead
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2) if read_ahead else None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def _load(self, index):
+        raise NotImplementedError
+
+    def _prepare(self, index):
+        return Overlay(self._load(index))
+
+    def __getitem__(self, index):
+        """
+        Get one frame of the animation.
+
+        Args:
+            index (int): Frame number, 0 <= index < len(self)
+
+        Returns:
+            Overlay: The prepared frame
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Overlay frame {index} out of range (0-{len(self) - 1})")
+
+        with self._lock:
+            overlay = self._cache.get(index)
+            if overlay is not None:
+                self._cache.move_to_end(index)
+            future = self._pending.pop(index, None)
+            self._schedule_read_ahead(index)
+
+        if overlay is not None:
+            return overlay
+
+        overlay = future.result() if future is not None else self._prepare(index)
+
+        with self._lock:
+            self._cache[index] = overlay
+            self._cache.move_to_end(index)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return overlay
+
+    def _schedule_read_ahead(self, index):
+        """Queue the frames after `index`; drop read-ahead that is no longer wanted."""
+        if self._executor is None:
+            return
+        wanted = range(index + 1, min(index + 1 + self.read_ahead, len(self)))
+
+        for pending_index in list(self._pending):
+            if pending_index not in wanted:
+                self._pending.pop(pending_index).cancel()
+
+        for next_index in wanted:
+            if next_index not in self._cache and next_index not in self._pending:
+                self._pending[next_index] = self._executor.submit(self._prepare, next_index)
+
+    def close(self):
+        """Stop the read-ahead threads and drop the cached frames."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            self._pending.clear()
+            self._cache.clear()
+
+
+class PngSequence(OverlaySequence):
+    """Overlay animation decoded from a folder of transparent PNGs, one file per frame."""
+
+    def __init__(self, folder, cache_size=CACHE_SIZE, read_ahead=READ_AHEAD):
+        self.files = list_sequence_files(folder)
+        if not self.files:
+            raise FileNotFoundError(f"No PNG frames found in: {folder}")
+        super().__init__(cache_size, read_ahead)
+
+    def __len__(self):
+        return len(self.files)
+
+    def _load(self, index):
+        image = cv2.imread(self.files[index], cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise FileNotFoundError(f"Failed to load overlay image: {self.files[index]}")
+        return image
+
+
+class AtlasSequence(OverlaySequence):
+    """
+    Overlay animation read from a pre-decoded atlas (see build_atlas).
+
+    The atlas is memory-mapped: frames are read straight from the page
+    cache, nothing is decoded, and only the pages touched are loaded.
+    """
+
+    def __init__(self, atlas_path, cache_size=CACHE_SIZE, read_ahead=READ_AHEAD):
+        self.frames = np.load(atlas_path, mmap_mode='r')
+        if self.frames.ndim != 4 or self.frames.shape[3] != 4:
+            raise ValueError(f"Not a BGRA overlay atlas: {atlas_path}")
+        super().__init__(cache_size, read_ahead)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def _load(self, index):
+        return self.frames[index]
+
+
+def build_atlas(folder, atlas_path):
+    """
+    Decode a folder of PNG frames once into a memory-mappable .npy atlas.
+
+    The frames are written one at a time, so building the atlas does not
+    need more memory than a single frame either.
+
+    Args:
+        folder (str): Folder containing the PNGs
+        atlas_path (str): Path of the .npy file to write
+
+    Returns:
+        tuple: Shape of the atlas (frames, height, width, 4)
+    """
+    files = list_sequence_files(folder)
+    if not files:
+        raise FileNotFoundError(f"No PNG frames found in: {folder}")
+
+    first = cv2.imread(files[0], cv2.IMREAD_UNCHANGED)
+    if first is None or first.ndim != 3 or first.shape[2] != 4:
+        raise ValueError("All overlay images must have an alpha channel.")
+
+    atlas = np.lib.format.open_memmap(
+        atlas_path, mode='w+', dtype=np.uint8, shape=(len(files),) + first.shape
+    )
+    for i, path in enumerate(files):
+        image = first if i == 0 else cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise FileNotFoundError(f"Failed to load overlay image: {path}")
+        if image.shape != first.shape:
+            raise ValueError(f"All overlay frames must have the same size: {path} is "
+                             f"{image.shape[1]}x{image.shape[0]}, expected {first.shape[1]}x{first.shape[0]}")
+        atlas[i] = image
+    atlas.flush()
+    return atlas.shape
+
+
+def open_overlay_sequence(path, cache_size=CACHE_SIZE, read_ahead=READ_AHEAD):
+    """
+    Open an overlay animation from a PNG folder or a .npy atlas.
+
+    Args:
+        path (str): Folder of PNGs, or an atlas written by build_atlas
+        cache_size (int): Prepared frames kept in memory
+        read_ahead (int): Frames decoded ahead of the one asked for
+
+    Returns:
+        OverlaySequence: The lazily loaded animation
+    """
+    if os.path.isdir(path):
+        return PngSequence(path, cache_size, read_ahead)
+    return AtlasSequence(path, cache_size, read_ahead)
+
+
+if __name__ == "__main__":
+    # Build an atlas once, then point the overlay scripts at it:
+    #   python overlay_sequence.py frames/ frames.npy
+    folder = sys.argv[1] if len(sys.argv) > 1 else "frames/"
+    atlas_path = sys.argv[2] if len(sys.argv) > 2 else "frames.npy"
+
+    count, height, width, _ = build_atlas(folder, atlas_path)
+    print(f"Wrote {count} frames of {width}x{height} to {atlas_path}")
@@ -0,0 +1,212 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from edit_graph import EditGraph
+from video_probe import probe_video
+
+# Audio is analyzed as mono float PCM at this rate; speech levels need no more
+SAMPLE_RATE = 16000
+
+# Loudness is measured over windows of this many seconds
+WINDOW = 0.05
+
+# Seconds of PCM read from ffmpeg at a time; memory use stays at one chunk
+CHUNK_SECONDS = 30
+
+# Windows quieter than this (dBFS) count as silence
+THRESHOLD_DB = -40.0
+
+# Only silences at least this long (seconds) are removed
+MIN_SILENCE = 1.0
+
+# Seconds of silence left on each side of the kept parts, so cuts do not clip speech
+PADDING = 0.2
+
+
+def stream_levels(input_file, sample_rate=SAMPLE_RATE, window=WINDOW, chunk_seconds=CHUNK_SECONDS):
+    """
+    Stream the loudness of an audio track, one chunk of windows at a time.
+
+    ffmpeg decodes the first audio track to mono 32-bit float PCM and
+    writes it to a pipe; each chunk is reshaped into windows and reduced to
+    RMS levels with NumPy, so memory use does not depend on the file length.
+
+    Args:
+        input_file (str): Path to the input video or audio file
+        sample_rate (int): Analysis sample rate
+        window (float): Window length in seconds
+        chunk_seconds (float): Seconds of audio per chunk
+
+    Yields:
+        numpy.ndarray: RMS level in dBFS of each consecutive window
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails, so a broken decode is
+            never mistaken for the end of the audio
+    """
+    window_samples = max(1, int(round(sample_rate * window)))
+    chunk_windows = max(1, int(chunk_seconds / window))
+    chunk_bytes = chunk_windows * window_samples * 4
+
+    cmd = [
+        'ffmpeg', '-v', 'error', '-i', input_file,
+        '-map', '0:a:0', '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 'f32le', '-'
+    ]
+    # stderr goes to a file so a chatty ffmpeg can never block the pipe
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=log)
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) - len(data) % 4], np.float32)
+            # The last chunk may end in a partial window: pad it with silence
+            padded = -len(samples) % window_samples
+            if padded:
+                samples = np.concatenate([samples, np.zeros(padded, np.float32)])
+            windows = samples.reshape(-1, window_samples)
+            rms = np.sqrt(np.einsum('ij,ij->i', windows, windows) / window_samples)
+            yield 20 * np.log10(np.maximum(rms, 1e-10))
+        finished = True
+        process.wait()
+        if process.returncode != 0:
+            log.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=log.read().decode('utf8', 'replace'))
+    finally:
+        process.stdout.close()
+        if not finished:
+            # Stopped early by the consumer: ffmpeg is no longer needed
+            process.kill()
+        process.wait()
+        log.close()
+
+
+def find_silences(input_file, threshold_db=THRESHOLD_DB, min_silence=MIN_SILENCE, padding=PADDING,
+                  sample_rate=SAMPLE_RATE, window=WINDOW):
+    """
+    Find the silent intervals of a file's audio.
+
+    Quiet windows are grouped into runs chunk by chunk (a run may span
+    chunks); runs of at least `min_silence` seconds are returned, shrunk by
+    `padding` on the sides that touch sound.
+
+    Args:
+        input_file (str): Path to the input video or audio file
+        threshold_db (float): Level (dBFS) below which a window is silent
+        min_silence (float): Shortest silence to report, in seconds
+        padding (float): Silence kept next to sound, in seconds
+        sample_rate (int): Analysis sample rate
+        window (float): Window length in seconds
+
+    Returns:
+        list: (start, end) tuples in seconds, ready for EditGraph.cut or
+            cut_and_concat_video(cut_ranges=...)
+    """
+    window_samples = max(1, int(round(sample_rate * window)))
+    window = window_samples / sample_rate
+
+    runs = []
+    run_start = None
+    position = 0
+    for levels in stream_levels(input_file, sample_rate, window):
+        quiet = levels < threshold_db
+        if run_start is not None and not quiet[0]:
+            # The run carried over from the previous chunk ended on the chunk boundary
+            runs.append((run_start, position))
+            run_start = None
+        # Rising and falling edges of the quiet runs inside this chunk
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], quiet, [False]]).astype(np.int8)))
+        for start, end in zip(edges[0::2], edges[1::2]):
+            if start == 0 and run_start is not None:
+                runs.append((run_start, position + end))
+                run_start = None
+            else:
+                runs.append((position + start, position + end))
+        if quiet[-1]:
+            # The last run reaches the chunk end and may go on in the next one
+            run_start = runs.pop()[0]
+        position += len(levels)
+    if run_start is not None:
+        runs.append((run_start, position))
+
+    duration = position * window
+    silences = []
+    for start, end in runs:
+        start, end = start * window, min(end * window, duration)
+        if end - start < min_silence:
+            continue
+        if start > 0:
+            start += padding
+        if end < duration:
+            end -= padding
+        if end > start:
+            silences.append((round(start, 3), round(end, 3)))
+    return silences
+
+
+def remove_silence(input_file, output_file, threshold_db=THRESHOLD_DB, min_silence=MIN_SILENCE,
+                   padding=PADDING):
+    """
+    Remove the dead air of a video in one pass.
+
+    Silences are found with find_silences and all removed at once by an
+    EditGraph. Silence edges rarely fall on keyframes, so the kept parts
+    are usually trimmed and re-encoded by one filter graph; a stream copy
+    is only used when every kept part starts on a keyframe, since a copy
+    would otherwise start each part at the keyframe before it.
+
+    Args:
+        input_file (str): Path to the input video file
+        output_file (str): Path to save the output video
+        threshold_db (float): Level (dBFS) below which audio is silent
+        min_silence (float): Shortest silence to remove, in seconds
+        padding (float): Silence kept next to sound, in seconds
+
+    Returns:
+        bool: True if successful (also when there is no silence to remove
+            and the input is copied as is), False otherwise
+    """
+    if not any(s['codec_type'] == 'audio' for s in probe_video(input_file)['streams']):
+        print(f"Error: {input_file} has no audio stream")
+        return False
+
+    try:
+        silences = find_silences(input_file, threshold_db, min_silence, padding)
+    except subprocess.CalledProcessError as e:
+        print(f"Decoding the audio failed: {e.stderr}")
+        return False
+    total = sum(end - start for start, end in silences)
+    print(f"Found {len(silences)} silence(s), {total:.1f} seconds in total")
+    if not silences:
+        shutil.copyfile(input_file, output_file)
+        print(f"No silence to remove, copied {input_file} to {output_file}")
+        return True
+
+    return EditGraph(input_file).cut(*silences).run(output_file)
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python silence_detect.py input.mp4                       (list the silences)
+    #   python silence_detect.py input.mp4 output.mp4 --threshold=-35 --min=0.8
+    options = {'threshold': THRESHOLD_DB, 'min': MIN_SILENCE, 'padding': PADDING}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            sys.argv.remove(arg)
+            name, value = arg[2:].split("=", 1)
+            options[name] = float(value)
+
+    input_file = sys.argv[1] if len(sys.argv) > 1 else "input.mp4"
+
+    if len(sys.argv) > 2:
+        remove_silence(input_file, sys.argv[2], options['threshold'], options['min'], options['padding'])
+    else:
+        for start, end in find_silences(input_file, options['threshold'], options['min'], options['padding']):
+            print(f"{start:10.3f} - {end:10.3f}  ({end - start:.2f}s)")
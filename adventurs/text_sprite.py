@@ -0,0 +1,188 @@
+import math
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from overlay_blend import PreparedOverlay
+
+# Distinct text sprites kept in memory
+CACHE_SIZE = 512
+
+# TrueType pixel size for font_scale 1.0, about the height of FONT_HERSHEY_SIMPLEX
+TRUETYPE_SIZE = 30
+
+_truetype_fonts = {}
+_truetype_lock = threading.Lock()
+
+
+def _truetype_font(path, size):
+    """Load a TrueType font once per (path, size); PIL is only needed for TrueType text."""
+    key = (path, size)
+    font = _truetype_fonts.get(key)
+    if font is None:
+        try:
+            from PIL import ImageFont
+        except ImportError:
+            raise ImportError("TrueType fonts need Pillow: pip install pillow")
+        with _truetype_lock:
+            font = _truetype_fonts.setdefault(key, ImageFont.truetype(path, size))
+    return font
+
+
+def _text_mask(text, font, font_scale, thickness, pad):
+    """
+    Rasterize text into a coverage mask.
+
+    Returns:
+        tuple: (mask, origin) where origin is the (x, y) of the text baseline
+            start in the mask, as for cv2.putText
+    """
+    if isinstance(font, str):
+        from PIL import Image, ImageDraw
+
+        ttf = _truetype_font(font, max(1, round(TRUETYPE_SIZE * font_scale)))
+        left, top, right, bottom = ttf.getbbox(text, anchor='ls')
+        left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+        origin = (pad - left, pad - top)
+        image = Image.new('L', (right - left + 2 * pad, bottom - top + 2 * pad), 0)
+        ImageDraw.Draw(image).text(origin, text, font=ttf, fill=255, anchor='ls')
+        return np.asarray(image), origin
+
+    (width, height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    # Strokes reach about thickness / 2 beyond the size OpenCV reports
+    pad += thickness
+    origin = (pad, pad + height)
+    mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+    cv2.putText(mask, text, origin, font, font_scale, 255, thickness, cv2.LINE_AA)
+    return mask, origin
+
+
+def render_text_sprite(text, font=cv2.FONT_HERSHEY_SIMPLEX, font_scale=1.0, color=(255, 255, 255),
+                       thickness=2, outline=None, shadow=None):
+    """
+    Rasterize styled text once into a BGRA image.
+
+    Layers are composited bottom to top: shadow, outline, then the text.
+
+    Args:
+        text (str): Text to draw (one line)
+        font: A cv2.FONT_HERSHEY_* constant, or the path of a .ttf/.otf file
+        font_scale (float): Hershey font scale; TrueType fonts are drawn at
+            TRUETYPE_SIZE * font_scale pixels
+        color (tuple): BGR text color
+        thickness (int): Stroke thickness of Hershey fonts (TrueType glyphs are filled)
+        outline (tuple): Optional (BGR color, width in pixels) outline
+        shadow (tuple): Optional (BGR color, (dx, dy) offset in pixels) drop shadow
+
+    Returns:
+        tuple: (BGRA uint8 image, origin) where origin is the (x, y) of the
+            text baseline start in the image
+    """
+    outline_width = outline[1] if outline else 0
+    shadow_offset = shadow[1] if shadow else (0, 0)
+    pad = outline_width + max(abs(shadow_offset[0]), abs(shadow_offset[1]))
+
+    mask, origin = _text_mask(text, font, font_scale, thickness, pad)
+
+    layers = []
+    silhouette = mask
+    if outline:
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * outline_width + 1, 2 * outline_width + 1))
+        silhouette = cv2.dilate(mask, kernel)
+    if shadow:
+        dx, dy = shadow_offset
+        shift = np.float32([[1, 0, dx], [0, 1, dy]])
+        layers.append((shadow[0], cv2.warpAffine(silhouette, shift, (mask.shape[1], mask.shape[0]))))
+    if outline:
+        layers.append((outline[0], silhouette))
+    layers.append((color, mask))
+
+    # "Over" compositing with straight alpha, done once per sprite
+    height, width = mask.shape
+    out_color = np.zeros((height, width, 3), dtype=np.float32)
+    out_alpha = np.zeros((height, width, 1), dtype=np.float32)
+    for layer_color, layer_mask in layers:
+        alpha = layer_mask[:, :, None].astype(np.float32) / 255.0
+        out_color = np.float32(layer_color) * alpha + out_color * (1.0 - alpha)
+        out_alpha = alpha + out_alpha * (1.0 - alpha)
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    # out_color is premultiplied by out_alpha; store straight color
+    image[:, :, :3] = np.clip(out_color / np.maximum(out_alpha, 1e-6) + 0.5, 0, 255)
+    image[:, :, 3] = np.clip(out_alpha[:, :, 0] * 255.0 + 0.5, 0, 255)
+    return image, origin
+
+
+class TextSprite:
+    """A styled text rasterized once, blitted onto frames by its bounding box."""
+
+    def __init__(self, image, origin):
+        self.origin = origin
+        self.prepared = PreparedOverlay(image)
+
+    def draw(self, frame, position):
+        """
+        Blend the text onto a frame, in place, clipping at the frame edges.
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            position (tuple): Bottom-left corner of the text (x, y), as for cv2.putText
+
+        Returns:
+            numpy.ndarray: The same frame
+        """
+        self.prepared.blend_at(frame, position[0] - self.origin[0], position[1] - self.origin[1])
+        return frame
+
+
+class TextRenderer:
+    """
+    Draws timed text onto frames from a cache of pre-rendered sprites.
+
+    Each distinct (text, font, scale, color, thickness, outline, shadow) is
+    rasterized once; drawing it again is a blend of its bounding box only.
+    Safe to use from several frame pipeline workers.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sprite(self, text, font=cv2.FONT_HERSHEY_SIMPLEX, font_scale=1.0, color=(255, 255, 255),
+               thickness=2, outline=None, shadow=None):
+        """Get the cached sprite of a styled text (see render_text_sprite for the arguments)."""
+        key = (text, font, font_scale, tuple(color), thickness,
+               outline and (tuple(outline[0]), outline[1]),
+               shadow and (tuple(shadow[0]), tuple(shadow[1])))
+
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                return sprite
+
+        sprite = TextSprite(*render_text_sprite(text, font, font_scale, color, thickness, outline, shadow))
+
+        with self._lock:
+            self._sprites[key] = sprite
+            while len(self._sprites) > self.cache_size:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def draw(self, frame, text, position, **style):
+        """
+        Draw styled text onto a frame, in place.
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            text (str): Text to draw
+            position (tuple): Bottom-left corner of the text (x, y), as for cv2.putText
+            **style: font, font_scale, color, thickness, outline, shadow
+
+        Returns:
+            numpy.ndarray: The same frame
+        """
+        return self.sprite(text, **style).draw(frame, position)
@@ -0,0 +1,253 @@
+import csv
+import json
+import os
+import re
+
+# Event keys holding points or colors; JSON lists and CSV "x y" cells become tuples
+TUPLE_KEYS = {'position', 'start_point', 'end_point', 'center', 'color', 'font_color'}
+
+# Subtitle cue timing line, e.g. "00:00:01,000 --> 00:00:03,500 align:start"
+_CUE_TIMING = re.compile(r'^\s*(\S+)\s+-->\s+(\S+)')
+
+# Markup inside subtitle text: <i>, </b>, <c.yellow>, {\an8}
+_CUE_MARKUP = re.compile(r'<[^>]*>|\{[^}]*\}')
+
+
+def parse_timestamp(value):
+    """
+    Convert a timestamp to seconds.
+
+    Accepts seconds (int/float or numeric string), "HH:MM:SS", "MM:SS" and
+    subtitle timestamps with a comma or dot before the milliseconds
+    ("00:01:02,500", "01:02.500").
+
+    Args:
+        value (str|int|float): Timestamp
+
+    Returns:
+        float: Time in seconds
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    seconds = 0.0
+    for part in str(value).strip().replace(',', '.').split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class EventTimeline:
+    """
+    Index of timed events answering "what is active at time t" in O(log n + k).
+
+    Events are dicts with "start_time" and "end_time" in seconds (both
+    inclusive, like the per-frame checks it replaces). They are stored in a
+    centered interval tree: every node holds the events spanning its center,
+    sorted by start and by end, so a query walks one root-to-leaf path and
+    only touches the events it returns. Queries can come in any order, e.g.
+    from several frame pipeline workers.
+    """
+
+    def __init__(self, events):
+        """
+        Args:
+            events (iterable): Event dicts, e.g. a list or one of the load_* generators
+        """
+        self.events = list(events)
+        intervals = [
+            (float(event["start_time"]), float(event["end_time"]), i)
+            for i, event in enumerate(self.events)
+        ]
+        self._root = self._build(intervals)
+
+    def _build(self, intervals):
+        """Build the subtree for a list of (start, end, index) intervals."""
+        if not intervals:
+            return None
+
+        bounds = sorted(t for start, end, _ in intervals for t in (start, end))
+        center = bounds[len(bounds) // 2]
+
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        spanning = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+
+        return (
+            center,
+            sorted(spanning, key=lambda interval: interval[0]),
+            sorted(spanning, key=lambda interval: -interval[1]),
+            self._build(left),
+            self._build(right),
+        )
+
+    def __len__(self):
+        return len(self.events)
+
+    def active(self, time):
+        """
+        Get the events active at a time.
+
+        Args:
+            time (float): Time in seconds
+
+        Returns:
+            list: Active event dicts, in their original order
+        """
+        found = []
+        node = self._root
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if time < center:
+                for start, _, index in by_start:
+                    if start > time:
+                        break
+                    found.append(index)
+                node = left
+            elif time > center:
+                for _, end, index in by_end:
+                    if end < time:
+                        break
+                    found.append(index)
+                node = right
+            else:
+                found.extend(index for _, _, index in by_start)
+                break
+
+        # Later events are drawn over earlier ones, as in the event lists
+        found.sort()
+        return [self.events[index] for index in found]
+
+
+def _with_defaults(event, defaults):
+    merged = dict(defaults)
+    merged.update(event)
+    for key in TUPLE_KEYS & merged.keys():
+        value = merged[key]
+        if isinstance(value, str):
+            value = value.replace(',', ' ').split()
+        if isinstance(value, (list, tuple)):
+            merged[key] = tuple(int(float(v)) for v in value)
+    merged["start_time"] = parse_timestamp(merged["start_time"])
+    merged["end_time"] = parse_timestamp(merged["end_time"])
+    return merged
+
+
+def _iter_cues(f):
+    """Yield (start, end, text lines) for each timed cue of an SRT or WebVTT file."""
+    timing = None
+    lines = []
+    for line in f:
+        line = line.rstrip('\r\n')
+        match = _CUE_TIMING.match(line)
+        if match:
+            timing = match.groups()
+            lines = []
+        elif not line.strip():
+            if timing is not None:
+                yield timing[0], timing[1], lines
+            timing = None
+        elif timing is not None:
+            lines.append(line)
+        # Anything else (cue numbers, WEBVTT header, NOTE/STYLE blocks) is skipped
+    if timing is not None:
+        yield timing[0], timing[1], lines
+
+
+def load_subtitles(path, **defaults):
+    """
+    Stream the cues of an SRT or WebVTT file as text events.
+
+    Markup such as <i> or {\\an8} is removed and multi-line cues are joined
+    into one line.
+
+    Args:
+        path (str): Path to a .srt or .vtt file
+        **defaults: Keys added to every event, e.g. position, font_color, font_scale
+
+    Yields:
+        dict: Text events with "text", "start_time" and "end_time"
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        for start, end, lines in _iter_cues(f):
+            text = ' '.join(_CUE_MARKUP.sub('', line).strip() for line in lines).strip()
+            if text:
+                yield _with_defaults({"text": text, "start_time": start, "end_time": end}, defaults)
+
+
+def load_json_events(path, **defaults):
+    """
+    Stream events from a JSON list of event dicts, or JSON Lines (.jsonl).
+
+    Times may be seconds or "HH:MM:SS.mmm" strings; points and colors may
+    be lists.
+
+    Args:
+        path (str): Path to a .json or .jsonl file
+        **defaults: Keys added to every event
+
+    Yields:
+        dict: Events
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith('.jsonl'):
+            # One event per line: never holds more than one in memory
+            for line in f:
+                if line.strip():
+                    yield _with_defaults(json.loads(line), defaults)
+        else:
+            for event in json.load(f):
+                yield _with_defaults(event, defaults)
+
+
+def load_csv_events(path, **defaults):
+    """
+    Stream events from a CSV file with a header row.
+
+    Columns are event keys (e.g. type,text,start_time,end_time,position,color).
+    Points and colors are written as space-separated numbers ("380 480");
+    other numeric cells become numbers and empty cells are left out.
+
+    Args:
+        path (str): Path to a .csv file
+        **defaults: Keys added to every event
+
+    Yields:
+        dict: Events
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            event = {}
+            for key, value in row.items():
+                if value is None or value == '':
+                    continue
+                if key not in TUPLE_KEYS and key != 'text':
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        try:
+                            value = float(value)
+                        except ValueError:
+                            pass
+                event[key] = value
+            yield _with_defaults(event, defaults)
+
+
+def load_events(path, **defaults):
+    """
+    Stream events from a file, picking the importer from its extension.
+
+    Args:
+        path (str): A .srt, .vtt, .json, .jsonl or .csv file
+        **defaults: Keys added to every event
+
+    Returns:
+        iterator: Event dicts
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.srt', '.vtt'):
+        return load_subtitles(path, **defaults)
+    if extension in ('.json', '.jsonl'):
+        return load_json_events(path, **defaults)
+    if extension == '.csv':
+        return load_csv_events(path, **defaults)
+    raise ValueError(f"Unsupported event file: {path}")
@@ -0,0 +1,158 @@
+import ffmpeg
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from collections import OrderedDict
+
+# Number of files whose probe results are kept in memory
+CACHE_SIZE = 256
+
+# Set this environment variable to a file path to persist probe results
+CACHE_DB_ENV = "VISION_PROBE_CACHE"
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_store = None
+
+
+def file_identity(path):
+    """
+    Identify a file by what changes when it is replaced or rewritten.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        tuple: (real path, size, mtime in ns, inode)
+    """
+    stat = os.stat(path)
+    return (os.path.realpath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def enable_persistent_cache(db_path):
+    """
+    Persist probe results to a local SQLite file, shared between runs.
+
+    Args:
+        db_path (str): Path of the SQLite file (created if missing)
+    """
+    global _store
+    with _lock:
+        if _store is not None:
+            _store.close()
+        _store = sqlite3.connect(db_path, check_same_thread=False)
+        _store.execute(
+            "CREATE TABLE IF NOT EXISTS probe_cache ("
+            "path TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, kind TEXT, data TEXT, "
+            "PRIMARY KEY (path, size, mtime_ns, inode, kind))"
+        )
+        _store.commit()
+
+
+def clear_cache():
+    """Drop all in-memory probe results."""
+    with _lock:
+        _cache.clear()
+
+
+def _cached(path, kind, compute, decode=None):
+    """Return the cached `kind` result for a file, computing and storing it on a miss."""
+    identity = file_identity(path)
+
+    with _lock:
+        entry = _cache.get(identity)
+        if entry is not None:
+            _cache.move_to_end(identity)
+            if kind in entry:
+                return entry[kind]
+
+        if _store is not None:
+            row = _store.execute(
+                "SELECT data FROM probe_cache WHERE path=? AND size=? AND mtime_ns=? AND inode=? AND kind=?",
+                (*identity, kind)
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                if decode is not None:
+                    value = decode(value)
+                _remember(identity, kind, value)
+                return value
+
+    # Run ffprobe outside the lock so other files can be probed meanwhile
+    value = compute()
+
+    with _lock:
+        _remember(identity, kind, value)
+        if _store is not None:
+            _store.execute(
+                "INSERT OR REPLACE INTO probe_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (*identity, kind, json.dumps(value))
+            )
+            _store.commit()
+    return value
+
+
+def _remember(identity, kind, value):
+    _cache.setdefault(identity, {})[kind] = value
+    _cache.move_to_end(identity)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def probe_video(path):
+    """
+    Cached drop-in replacement for ffmpeg.probe.
+
+    Results are keyed by file identity (path, size, mtime, inode), so a file
+    that is rewritten is probed again.
+
+    Args:
+        path (str): Path to the media file
+
+    Returns:
+        dict: The ffprobe result, as returned by ffmpeg.probe
+    """
+    return _cached(path, 'probe', lambda: ffmpeg.probe(path))
+
+
+def get_packet_index(path):
+    """
+    Build (or fetch from the cache) a packet index of the first video stream.
+
+    Only packet headers are read (nothing is decoded), so building the index
+    costs a single demux pass over the file.
+
+    Args:
+        path (str): Path to the input video file
+
+    Returns:
+        list: (pts, dts, is_keyframe) tuples in decode order, times in seconds
+    """
+    def build():
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,dts_time,flags',
+            '-of', 'csv=p=0',
+            path
+        ]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+        packets = []
+        for line in result.stdout.splitlines():
+            fields = line.split(',')
+            if len(fields) < 3 or 'N/A' in fields[:2] or '' in fields[:2]:
+                continue
+            packets.append((float(fields[0]), float(fields[1]), 'K' in fields[2]))
+        return packets
+
+    # The persistent store keeps JSON lists; turn them back into tuples
+    return _cached(path, 'packets', build, lambda rows: [tuple(row) for row in rows])
+
+
+if os.environ.get(CACHE_DB_ENV):
+    enable_persistent_cache(os.environ[CACHE_DB_ENV])
@@ -2,16 +2,523 @@ import ffmpeg
 import subprocess
 import os
 import sys
+import tempfile
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
 
-def slice_video(input_file, output_file, start_time, end_time):
+from video_probe import get_packet_index, probe_video
+
+# Encoders able to reproduce a source stream closely enough for its re-encoded
+# GOPs to be stream-copied next to the original ones. H.264 only for now: the
+# concat demuxer inserts in-band SPS/PPS for H.264 (auto_convert), which lets
+# the re-encoded head/tail and the copied middle carry different parameters.
+SMART_CUT_ENCODERS = {
+    'h264': 'libx264',
+}
+
+# Codecs that can be stream-copied into each output container
+CONTAINER_CODECS = {
+    '.mp4': {'h264', 'hevc', 'av1', 'mpeg4', 'vp9', 'aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'},
+    '.mov': {'h264', 'hevc', 'mpeg4', 'prores', 'mjpeg', 'aac', 'mp3', 'ac3', 'eac3', 'alac', 'pcm_s16le', 'pcm_s24le'},
+    '.webm': {'vp8', 'vp9', 'av1', 'opus', 'vorbis'},
+}
+CONTAINER_CODECS['.m4v'] = CONTAINER_CODECS['.mp4']
+
+# Containers without a reliable seek index; slicing them must decode from the start
+UNSEEKABLE_FORMATS = {'h264', 'hevc', 'mpeg', 'mpegvideo', 'm4v', 'rawvideo'}
+
+# ffprobe profile names -> libx264 profile names
+H264_PROFILES = {
+    'constrained baseline': 'baseline',
+    'baseline': 'baseline',
+    'main': 'main',
+    'high': 'high',
+    'high 10': 'high10',
+    'high 4:2:2': 'high422',
+    'high 4:4:4 predictive': 'high444',
+}
+
+
+def time_to_seconds(time_value):
+    """
+    Convert a time in format "HH:MM:SS", "MM:SS" or seconds to seconds.
+
+    Args:
+        time_value (str|int|float): Time to convert
+
+    Returns:
+        float: Time in seconds
+    """
+    if isinstance(time_value, (int, float)):
+        return float(time_value)
+
+    seconds = 0.0
+    for part in str(time_value).strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def get_keyframe_times(input_file, packets=None):
+    """
+    Get the presentation times of all keyframes of the first video stream.
+
+    Args:
+        input_file (str): Path to the input video file
+        packets (list): Packet index from get_packet_index (built if omitted)
+
+    Returns:
+        list: Sorted keyframe times in seconds
+    """
+    if packets is None:
+        packets = get_packet_index(input_file)
+    return sorted(pts for pts, _, is_key in packets if is_key)
+
+
+def get_matching_encoder_args(video_stream):
+    """
+    Build encoder arguments that reproduce the parameters of a video stream.
+
+    Args:
+        video_stream (dict): Video stream entry from probe_video
+
+    Returns:
+        list: FFmpeg arguments, or None if the codec cannot be matched
+    """
+    encoder = SMART_CUT_ENCODERS.get(video_stream.get('codec_name'))
+    if encoder is None:
+        return None
+
+    args = ['-c:v', encoder, '-crf', '18', '-preset', 'medium']
+
+    if video_stream.get('pix_fmt'):
+        args += ['-pix_fmt', video_stream['pix_fmt']]
+
+    profile = H264_PROFILES.get(str(video_stream.get('profile', '')).lower())
+    if profile:
+        args += ['-profile:v', profile]
+
+    level = video_stream.get('level')
+    if isinstance(level, int) and level > 0:
+        args += ['-level:v', f"{level / 10:.1f}"]
+
+    for option in ('color_range', 'color_primaries', 'color_transfer', 'color_space'):
+        value = video_stream.get(option)
+        if value and value != 'unknown':
+            flag = {'color_transfer': 'color_trc', 'color_space': 'colorspace'}.get(option, option)
+            args += [f'-{flag}', value]
+
+    # Keep the source timestamps and time base so the pieces concatenate cleanly
+    args += ['-vsync', 'passthrough']
+    time_base = video_stream.get('time_base', '')
+    if '/' in time_base:
+        args += ['-video_track_timescale', time_base.split('/')[1]]
+
+    return args
+
+
+def get_frame_tolerance(video_stream):
+    """
+    Get half a frame duration, the tolerance used when matching keyframe times.
+
+    Args:
+        video_stream (dict): Video stream entry from probe_video
+
+    Returns:
+        float: Half a frame duration in seconds
+    """
+    rate = video_stream.get('avg_frame_rate') or video_stream.get('r_frame_rate') or '0/0'
+    num, _, den = rate.partition('/')
+    if float(num or 0) and float(den or 0):
+        return 0.5 * float(den) / float(num)
+    return 0.001
+
+
+def get_copy_end(packets, keyframe, offset, epsilon):
+    """
+    Find where stream copy has to stop before a keyframe.
+
+    The concat demuxer cuts on decode timestamps, so a copied part ending at
+    a keyframe stops at the keyframe's DTS. Frames shown before the keyframe
+    but decoded after it (B-frames) are then missing from the copied part and
+    have to be re-encoded along with the frames from the keyframe on.
+
+    Args:
+        packets (list): Packet index from get_packet_index
+        keyframe (float): Keyframe time in seconds, relative to the file start
+        offset (float): Start time of the file
+        epsilon (float): Tolerance when matching the keyframe time
+
+    Returns:
+        tuple: (outpoint, reencode_start) - the absolute DTS to use as concat
+            outpoint and the relative time to start re-encoding from
+    """
+    for order, (pts, dts, is_key) in enumerate(packets):
+        if is_key and abs(pts - offset - keyframe) < epsilon:
+            return dts, min(p for p, _, _ in packets[order:order + 16]) - offset
+    return keyframe + offset, keyframe
+
+
+def smart_cut_video(input_file, output_file, start_time, end_time, probe=None, packets=None):
+    """
+    Frame-accurately slice a video while re-encoding as little as possible.
+
+    Only the partial GOP at the head of the range (from start_time to the
+    first keyframe) and the partial GOP at the tail (from the last keyframe
+    to end_time) are re-encoded, using the source codec parameters. Every
+    complete GOP in between is stream-copied straight from the source, and
+    the audio is stream-copied for the whole range.
+
+    Args:
+        input_file (str): Path to the input video file
+        output_file (str): Path to save the output video
+        start_time (str): Start time in format "HH:MM:SS" or seconds
+        end_time (str): End time in format "HH:MM:SS" or seconds
+        probe (dict): Result of probe_video for input_file (probed if omitted)
+        packets (list): Packet index from get_packet_index (built if omitted)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if probe is None:
+        probe = probe_video(input_file)
+
+    video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+    if video_stream is None:
+        print("Smart cut needs a video stream")
+        return False
+
+    encoder_args = get_matching_encoder_args(video_stream)
+    if encoder_args is None:
+        print(f"Smart cut does not support codec '{video_stream.get('codec_name')}'")
+        return False
+
+    if packets is None:
+        packets = get_packet_index(input_file)
+
+    start = time_to_seconds(start_time)
+    end = time_to_seconds(end_time)
+
+    # Packet times are absolute, user times are relative to the file start
+    offset = float(probe['format'].get('start_time', 0) or 0)
+    keyframes = [t - offset for t in get_keyframe_times(input_file, packets)]
+
+    # Half a frame of tolerance when comparing against keyframe times
+    epsilon = get_frame_tolerance(video_stream)
+
+    # Copy range: first keyframe at/after start to last keyframe at/before end
+    first = bisect_left(keyframes, start - epsilon)
+    last = bisect_right(keyframes, end + epsilon) - 1
+    if first < len(keyframes) and last >= 0 and keyframes[first] < keyframes[last]:
+        copy_start = keyframes[first]
+        copy_end = keyframes[last]
+    else:
+        copy_start = copy_end = end
+
+    # The copied middle ends at the keyframe's DTS, the tail re-encode picks up
+    # the B-frames decoded after it
+    copy_end_dts, tail_start = copy_end + offset, copy_end
+    if copy_end < end:
+        copy_end_dts, tail_start = get_copy_end(packets, copy_end, offset, epsilon)
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            concat_list = os.path.join(temp_dir, "concat_list.txt")
+            entries = []
+
+            def encode_piece(name, piece_start, piece_end):
+                piece = os.path.join(temp_dir, name)
+                cmd = [
+                    'ffmpeg',
+                    '-y',
+                    '-ss', f"{piece_start:.6f}",
+                    '-i', input_file,
+                    '-t', f"{piece_end - piece_start:.6f}",
+                    '-map', '0:v:0',
+                    '-an', '-sn', '-dn',
+                    *encoder_args,
+                    piece
+                ]
+                subprocess.run(cmd, capture_output=True, text=True, check=True)
+                return piece
+
+            if copy_start - start > epsilon:
+                print(f"Re-encoding head ({start:.3f}s to {copy_start:.3f}s)...")
+                entries.append(f"file '{encode_piece('head.mp4', start, copy_start)}'\n")
+
+            if copy_end > copy_start:
+                print(f"Stream-copying middle ({copy_start:.3f}s to {copy_end:.3f}s)...")
+                entries.append(
+                    f"file '{os.path.abspath(input_file)}'\n"
+                    f"inpoint {copy_start + offset:.6f}\n"
+                    f"outpoint {copy_end_dts:.6f}\n"
+                )
+
+            if end - tail_start > epsilon:
+                print(f"Re-encoding tail ({tail_start:.3f}s to {end:.3f}s)...")
+                entries.append(f"file '{encode_piece('tail.mp4', tail_start, end)}'\n")
+
+            with open(concat_list, 'w') as f:
+                f.writelines(entries)
+
+            # Join the video pieces and copy the audio of the range alongside
+            cmd = [
+                'ffmpeg',
+                '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_list,
+                '-ss', f"{start:.6f}",
+                '-to', f"{end:.6f}",
+                '-i', input_file,
+                '-map', '0:v:0',
+                '-map', '1:a?',
+                '-c', 'copy',
+                output_file
+            ]
+
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Smart cut concatenation failed: {result.stderr}")
+                return False
+    except subprocess.CalledProcessError as e:
+        print(f"Smart cut re-encoding failed: {e.stderr}")
+        return False
+
+    print(f"Smart cut successful: Created {output_file}")
+    return True
+
+
+# Method chosen by plan_slice, with the reason and the method to fall back to
+SlicePlan = namedtuple('SlicePlan', ['method', 'reason', 'fallback'])
+
+
+def plan_slice(probe, output_file, start_time, end_time, packets=None):
+    """
+    Pick the cheapest slicing method that will succeed for a file.
+
+    The probe result is inspected once (streams, codecs, container, timestamp
+    sanity, keyframe spacing) instead of trying each method in turn:
+
+    - "copy": the range starts and ends on keyframes, or the file is audio only
+    - "smart": the range spans at least one full GOP of a supported codec
+    - "reencode": short ranges or codecs that cannot be smart cut
+    - "accurate": timestamps or seek index are unreliable, decode from the start
+
+    The "filter" method (trim filters) is never planned, it is always the most
+    expensive one, but can still be requested explicitly in slice_video.
+
+    Args:
+        probe (dict): Result of probe_video for the input file
+        output_file (str): Path of the output video (its container matters)
+        start_time (str): Start time in format "HH:MM:SS" or seconds
+        end_time (str): End time in format "HH:MM:SS" or seconds
+        packets (list): Packet index from get_packet_index, needed to plan
+            "copy" and "smart" for files with video
+
+    Returns:
+        SlicePlan: The chosen method, why it was chosen and its fallback
+
+    Raises:
+        ValueError: If the range is empty or inverted
     """
-    Slice a video using multiple methods, ensuring audio is preserved.
+    start = time_to_seconds(start_time)
+    end = time_to_seconds(end_time)
+    if start >= end:
+        raise ValueError(f"Empty or inverted range: {start_time} - {end_time}")
+
+    fmt = probe.get('format', {})
+    video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+    audio_stream = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+
+    # Stream copy is only possible if the output container can hold the codecs
+    allowed = CONTAINER_CODECS.get(os.path.splitext(output_file)[1].lower())
+    copyable = allowed is None or all(
+        s['codec_name'] in allowed for s in (video_stream, audio_stream) if s is not None
+    )
+
+    # Timestamp sanity: a duration, a non-negative start and a seekable container
+    try:
+        duration = float(fmt.get('duration', 0))
+        file_start = float(fmt.get('start_time', 0))
+    except (TypeError, ValueError):
+        duration, file_start = 0.0, -1.0
+    format_names = set(fmt.get('format_name', '').split(','))
+    if duration <= 0 or file_start < 0 or format_names & UNSEEKABLE_FORMATS:
+        return SlicePlan('accurate', "unreliable timestamps or no seek index", None)
+
+    if video_stream is None:
+        if copyable:
+            return SlicePlan('copy', "audio only, every audio packet is a keyframe", 'reencode')
+        return SlicePlan('reencode', "audio codec not supported by the output container", 'accurate')
+
+    if not copyable:
+        return SlicePlan('reencode', "codecs not supported by the output container", 'accurate')
+
+    if not packets:
+        return SlicePlan('reencode', "no packet index available", 'accurate')
+
+    keyframes = [t - file_start for t in get_keyframe_times(None, packets)]
+    if not keyframes:
+        return SlicePlan('accurate', "no keyframes found in the packet index", None)
+
+    # Half a frame of tolerance when matching keyframes
+    epsilon = get_frame_tolerance(video_stream)
+
+    def on_keyframe(t):
+        i = bisect_left(keyframes, t - epsilon)
+        return i < len(keyframes) and keyframes[i] <= t + epsilon
+
+    if on_keyframe(start) and (end >= duration - epsilon or on_keyframe(end)):
+        return SlicePlan('copy', "range is aligned to keyframes", 'reencode')
+
+    first = bisect_left(keyframes, start - epsilon)
+    last = bisect_right(keyframes, end + epsilon) - 1
+    spans_gop = first < len(keyframes) and last >= 0 and keyframes[first] < keyframes[last]
+
+    if video_stream.get('codec_name') not in SMART_CUT_ENCODERS:
+        return SlicePlan('reencode', f"codec '{video_stream.get('codec_name')}' cannot be smart cut", 'accurate')
+    if not spans_gop:
+        return SlicePlan('reencode', "range is shorter than a GOP", 'accurate')
+    return SlicePlan('smart', "only the partial GOPs at the edges need re-encoding", 'reencode')
+
+
+def slice_by_filter(input_file, output_file, start_time, end_time, has_audio):
+    """Slice with trim/atrim filters (decodes from the start of the file)."""
+    input_stream = ffmpeg.input(input_file)
+    
+    # Apply trim filter to video and audio separately
+    video = (
+        input_stream.video
+        .trim(start=start_time, end=end_time)
+        .setpts('PTS-STARTPTS')
+    )
+    
+    if has_audio:
+        audio = (
+            input_stream.audio
+            .filter_('atrim', start=start_time, end=end_time)
+            .filter_('asetpts', 'PTS-STARTPTS')
+        )
+        # Join video and audio
+        output = ffmpeg.output(video, audio, output_file)
+    else:
+        output = ffmpeg.output(video, output_file)
+    
+    # Run with overwrite and capture stderr
+    output.global_args('-y').run(capture_stderr=True)
+
+
+def slice_by_copy(input_file, output_file, start_time, end_time, has_audio):
+    """Slice with input seeking and stream copy (snaps to keyframes)."""
+    input_stream = ffmpeg.input(input_file, ss=start_time, to=end_time)
+    
+    # Map all streams
+    args = {
+        'map': '0',      # Include all streams
+        'c:v': 'copy',   # Copy video codec
+    }
+    
+    if has_audio:
+        args['c:a'] = 'copy'  # Copy audio codec
+    
+    # Output with global args
+    (
+        input_stream
+        .output(output_file, **args)
+        .global_args('-y')
+        .run(capture_stderr=True)
+    )
+
+
+def slice_by_reencode(input_file, output_file, start_time, end_time, has_audio):
+    """Slice with accurate input seeking and a full re-encode of the range."""
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-ss', str(start_time),
+        '-i', input_file,
+        '-to', str(time_to_seconds(end_time) - time_to_seconds(start_time)),
+        '-map', '0',          # Include all streams
+        '-c:v', 'libx264',    # Re-encode video
+        '-c:a', 'aac',        # Re-encode audio to AAC
+        '-strict', 'experimental',
+        '-b:a', '192k',       # Good audio quality
+        output_file
+    ]
+    
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def slice_by_output_seek(input_file, output_file, start_time, end_time, has_audio):
+    """Slice with output seeking, decoding from the start without using the index."""
+    # Calculate duration from "HH:MM:SS" or seconds
+    duration = time_to_seconds(end_time) - time_to_seconds(start_time)
+    
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-i', input_file,
+        '-ss', str(start_time),
+        '-t', str(duration),
+        '-map', '0:v:0?',    # Map video stream if present
+        '-map', '0:a?',      # Map audio stream if present
+        '-c:v', 'libx264',   # Video codec 
+        '-c:a', 'aac',       # Audio codec
+        '-b:a', '192k',      # Audio bitrate
+        output_file
+    ]
+    
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+SLICE_METHODS = {
+    'filter': slice_by_filter,
+    'copy': slice_by_copy,
+    'reencode': slice_by_reencode,
+    'accurate': slice_by_output_seek,
+}
+
+
+def run_slice_method(method, input_file, output_file, start_time, end_time, probe, packets=None):
+    """
+    Run a single slicing method.
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        if method == 'smart':
+            return smart_cut_video(input_file, output_file, start_time, end_time, probe, packets)
+
+        has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
+        SLICE_METHODS[method](input_file, output_file, start_time, end_time, has_audio)
+        print(f"Method '{method}' successful: Created {output_file}")
+        return True
+    except ffmpeg.Error as e:
+        error_msg = e.stderr.decode('utf8') if hasattr(e, 'stderr') and e.stderr else str(e)
+        print(f"Method '{method}' failed: {error_msg}")
+    except subprocess.CalledProcessError as e:
+        print(f"Method '{method}' failed: {e.stderr}")
+    except Exception as e:
+        print(f"Method '{method}' failed with exception: {str(e)}")
+    return False
+
+
+def slice_video(input_file, output_file, start_time, end_time, method=None, fallback=True):
+    """
+    Slice a video, ensuring audio is preserved.
+    
+    The input is probed once and plan_slice picks the cheapest method that
+    will succeed. A fallback method only runs if the planned one fails.
     
     Args:
         input_file (str): Path to the input video file
         output_file (str): Path to save the output video
         start_time (str): Start time in format "HH:MM:SS" or seconds
         end_time (str): End time in format "HH:MM:SS" or seconds
+        method (str): Force a method ("copy", "smart", "reencode", "accurate"
+            or "filter") instead of planning one
+        fallback (bool): Whether to try the plan's fallback method on failure
         
     Returns:
         bool: True if successful, False otherwise
@@ -21,152 +528,241 @@ def slice_video(input_file, output_file, start_time, end_time):
         print(f"Error: Input file '{input_file}' does not exist")
         return False
     
-    # Method 1: Using filter_complex with audio streams explicitly mapped
+    if time_to_seconds(start_time) >= time_to_seconds(end_time):
+        print(f"Error: Empty or inverted range {start_time} - {end_time}")
+        return False
+    
     try:
-        print(f"Attempting Method 1: filter complex with explicit audio mapping...")
-        
-        # Get information about input file
-        probe = ffmpeg.probe(input_file)
-        
-        # Check if file has audio
-        has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
-        
-        # Create base input
-        input_stream = ffmpeg.input(input_file)
-        
-        # Apply trim filter to video and audio separately
-        video = (
-            input_stream.video
-            .trim(start=start_time, end=end_time)
-            .setpts('PTS-STARTPTS')
-        )
-        
-        if has_audio:
-            audio = (
-                input_stream.audio
-                .filter_('atrim', start=start_time, end=end_time)
-                .filter_('asetpts', 'PTS-STARTPTS')
-            )
-            # Join video and audio
-            output = ffmpeg.output(video, audio, output_file)
-        else:
-            output = ffmpeg.output(video, output_file)
-        
-        # Run with overwrite and capture stderr
-        output.global_args('-y').run(capture_stderr=True)
-        
-        print(f"Method 1 successful: Created {output_file}")
-        return True
+        probe = probe_video(input_file)
     except ffmpeg.Error as e:
         error_msg = e.stderr.decode('utf8') if hasattr(e, 'stderr') and e.stderr else str(e)
-        print(f"Method 1 failed: {error_msg}")
+        print(f"Probing failed: {error_msg}")
+        return False
     
-    # Method 2: Using ss and to with separate audio and video streams
-    try:
-        print(f"Attempting Method 2: ss/to with explicit audio mapping...")
-        
-        # Get information about input file
-        probe = ffmpeg.probe(input_file)
-        
-        # Check if file has audio
-        has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
-        
-        # Create base input with seeking
-        input_stream = ffmpeg.input(input_file, ss=start_time, to=end_time)
-        
-        # Map all streams
-        args = {
-            'map': '0',      # Include all streams
-            'c:v': 'copy',   # Copy video codec
-        }
-        
-        if has_audio:
-            args['c:a'] = 'copy'  # Copy audio codec
-        
-        # Output with global args
-        (
-            input_stream
-            .output(output_file, **args)
-            .global_args('-y')
-            .run(capture_stderr=True)
-        )
-        
-        print(f"Method 2 successful: Created {output_file}")
+    # The packet index is only needed to plan or run copy/smart cuts
+    packets = None
+    if method in (None, 'smart') and any(s['codec_type'] == 'video' for s in probe['streams']):
+        try:
+            packets = get_packet_index(input_file)
+        except subprocess.CalledProcessError as e:
+            print(f"Building the packet index failed: {e.stderr}")
+    
+    if method is None:
+        plan = plan_slice(probe, output_file, start_time, end_time, packets)
+    else:
+        plan = SlicePlan(method, "requested", 'reencode' if method == 'smart' else None)
+    
+    print(f"Using method '{plan.method}': {plan.reason}")
+    if run_slice_method(plan.method, input_file, output_file, start_time, end_time, probe, packets):
         return True
-    except ffmpeg.Error as e:
-        error_msg = e.stderr.decode('utf8') if hasattr(e, 'stderr') and e.stderr else str(e)
-        print(f"Method 2 failed: {error_msg}")
     
-    # Method 3: Two-pass approach with explicit audio encoding (most reliable)
-    try:
-        print(f"Attempting Method 3: Two-pass approach with explicit audio...")
-        cmd = [
-            'ffmpeg',
-            '-y',
-            '-ss', start_time,
-            '-i', input_file,
-            '-to', f"{end_time}",
-            '-map', '0',          # Include all streams
-            '-c:v', 'libx264',    # Re-encode video
-            '-c:a', 'aac',        # Re-encode audio to AAC
-            '-strict', 'experimental',
-            '-b:a', '192k',       # Good audio quality
-            output_file
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print(f"Method 3 successful: Created {output_file}")
+    if fallback and plan.fallback:
+        print(f"Falling back to method '{plan.fallback}'...")
+        if run_slice_method(plan.fallback, input_file, output_file, start_time, end_time, probe, packets):
             return True
-        else:
-            print(f"Method 3 failed: {result.stderr}")
-    except Exception as e:
-        print(f"Method 3 failed with exception: {str(e)}")
     
-    # Method 4: Using direct subprocess call with precise options
-    try:
-        print(f"Attempting Method 4: Direct FFmpeg with precise options...")
-        
-        # Calculate duration if times are in HH:MM:SS format
-        if ":" in start_time and ":" in end_time:
-            # Convert HH:MM:SS to seconds
-            def time_to_seconds(time_str):
-                h, m, s = time_str.split(':')
-                return int(h) * 3600 + int(m) * 60 + float(s)
-            
-            duration = time_to_seconds(end_time) - time_to_seconds(start_time)
-        else:
-            # Assume they're already in seconds
-            duration = float(end_time) - float(start_time)
-        
-        cmd = [
-            'ffmpeg',
-            '-y',
-            '-i', input_file,
-            '-ss', start_time,
-            '-t', str(duration),
-            '-map', '0:v:0',     # Map video stream
-            '-map', '0:a?',      # Map audio stream if present
-            '-c:v', 'libx264',   # Video codec 
-            '-c:a', 'aac',       # Audio codec
-            '-b:a', '192k',      # Audio bitrate
+    print("Video slicing failed.")
+    return False
+
+# Re-encoded ranges closer together than this (seconds) share one decode
+SHARED_DECODE_GAP = 10.0
+
+
+def slice_ranges_by_copy(input_file, jobs, packets=None, file_start=0.0, video_stream=None):
+    """
+    Stream-copy several ranges in one ffmpeg process and one read of the file.
+
+    Args:
+        input_file (str): Path to the input video file
+        jobs (list): (output_file, start, end) tuples, times in seconds
+        packets (list): Packet index; when given, each output starts at the
+            decode timestamp of its first keyframe so the keyframe is kept
+        file_start (float): Start time of the file, to make packet times relative
+        video_stream (dict): Video stream entry from probe_video, for the
+            keyframe matching tolerance (needed with packets)
+    """
+    # Half a frame of tolerance when matching keyframes, as in plan_slice
+    epsilon = get_frame_tolerance(video_stream) if video_stream else 0.0
+    keyframes = sorted((pts - file_start, dts - file_start) for pts, dts, is_key in packets or [] if is_key)
+    keyframe_times = [pts for pts, _ in keyframes]
+
+    # No input seek: the source is read once, up to the end of the last range
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-to', f"{max(end for _, _, end in jobs):.6f}",
+        '-i', input_file,
+    ]
+    for output_file, start, end in jobs:
+        # Nearest keyframe to the (keyframe-aligned) start of the range
+        copy_start = start
+        i = bisect_left(keyframe_times, start)
+        nearby = [k for k in keyframes[max(0, i - 1):i + 1] if abs(k[0] - start) <= epsilon]
+        if nearby:
+            copy_start = min(nearby, key=lambda k: abs(k[0] - start))[1]
+        cmd += [
+            '-ss', f"{max(0.0, copy_start - 0.0005):.6f}",
+            '-to', f"{end:.6f}",
+            '-map', '0',
+            '-c', 'copy',
             output_file
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print(f"Method 4 successful: Created {output_file}")
-            return True
+
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def slice_ranges_by_reencode(input_file, jobs, has_video, has_audio):
+    """
+    Re-encode several ranges in one ffmpeg process.
+
+    Ranges lying within SHARED_DECODE_GAP of each other form a cluster. Each
+    cluster is opened with an accurate input seek and decoded once, and its
+    frames are split to the trim filters of every range in the cluster.
+
+    Args:
+        input_file (str): Path to the input video file
+        jobs (list): (output_file, start, end) tuples, times in seconds
+        has_video (bool): Whether the input has a video stream
+        has_audio (bool): Whether the input has an audio stream
+    """
+    clusters = []
+    for job in sorted(jobs, key=lambda job: job[1]):
+        if clusters and job[1] - clusters[-1]['end'] <= SHARED_DECODE_GAP:
+            clusters[-1]['jobs'].append(job)
+            clusters[-1]['end'] = max(clusters[-1]['end'], job[2])
         else:
-            print(f"Method 4 failed: {result.stderr}")
-    except Exception as e:
-        print(f"Method 4 failed with exception: {str(e)}")
-    
-    # If all methods failed
-    print("All slicing methods failed.")
-    return False
+            clusters.append({'start': job[1], 'end': job[2], 'jobs': [job]})
+
+    cmd = ['ffmpeg', '-y']
+    for cluster in clusters:
+        cmd += ['-ss', f"{cluster['start']:.6f}", '-to', f"{cluster['end']:.6f}", '-i', input_file]
+
+    filters = []
+    outputs = []
+    for i, cluster in enumerate(clusters):
+        count = len(cluster['jobs'])
+        if has_video:
+            filters.append(f"[{i}:v:0]split={count}" + ''.join(f"[v{i}_{j}]" for j in range(count)))
+        if has_audio:
+            filters.append(f"[{i}:a:0]asplit={count}" + ''.join(f"[a{i}_{j}]" for j in range(count)))
+
+        for j, (output_file, start, end) in enumerate(cluster['jobs']):
+            # Trim times are relative to the cluster's seek point
+            trim = f"start={start - cluster['start']:.6f}:end={end - cluster['start']:.6f}"
+            if has_video:
+                filters.append(f"[v{i}_{j}]trim={trim},setpts=PTS-STARTPTS[vo{i}_{j}]")
+                outputs += ['-map', f"[vo{i}_{j}]", '-c:v', 'libx264']
+            if has_audio:
+                filters.append(f"[a{i}_{j}]atrim={trim},asetpts=PTS-STARTPTS[ao{i}_{j}]")
+                outputs += ['-map', f"[ao{i}_{j}]", '-c:a', 'aac', '-b:a', '192k']
+            outputs.append(output_file)
+
+    cmd += ['-filter_complex', ';'.join(filters)] + outputs
+
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def slice_video_ranges(input_file, ranges, output_files=None, fallback=True):
+    """
+    Slice many ranges out of one video, opening and probing it only once.
+
+    Every range is planned with plan_slice from a single probe and packet
+    index. Ranges planned for stream copy are written by one ffmpeg process
+    reading the source once, ranges planned for re-encoding share one process
+    and one decode per cluster of nearby ranges, and smart cuts reuse the
+    probe and packet index instead of building their own.
+
+    Args:
+        input_file (str): Path to the input video file
+        ranges (list): (start_time, end_time) tuples in "HH:MM:SS" or seconds
+        output_files (list): Output paths, one per range (defaults to
+            "<input>_clip_000.<ext>", "<input>_clip_001.<ext>", ...)
+        fallback (bool): Whether to retry failed ranges with their fallback method
+
+    Returns:
+        list: True/False for each range
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: Input file '{input_file}' does not exist")
+        return [False] * len(ranges)
+
+    if output_files is None:
+        base, ext = os.path.splitext(input_file)
+        output_files = [f"{base}_clip_{i:03d}{ext}" for i in range(len(ranges))]
+
+    try:
+        probe = probe_video(input_file)
+    except ffmpeg.Error as e:
+        error_msg = e.stderr.decode('utf8') if hasattr(e, 'stderr') and e.stderr else str(e)
+        print(f"Probing failed: {error_msg}")
+        return [False] * len(ranges)
+
+    video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+    has_video = video_stream is not None
+    has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
+    file_start = float(probe['format'].get('start_time', 0) or 0)
+
+    packets = None
+    if has_video:
+        try:
+            packets = get_packet_index(input_file)
+        except subprocess.CalledProcessError as e:
+            print(f"Building the packet index failed: {e.stderr}")
+
+    # Empty or inverted ranges fail up front; the others get a plan
+    plans = [None] * len(ranges)
+    for i, (output_file, (start_time, end_time)) in enumerate(zip(output_files, ranges)):
+        if time_to_seconds(start_time) >= time_to_seconds(end_time):
+            print(f"{output_file}: Error: Empty or inverted range {start_time} - {end_time}")
+            continue
+        plans[i] = plan_slice(probe, output_file, start_time, end_time, packets)
+        print(f"{output_file}: method '{plans[i].method}' ({plans[i].reason})")
+
+    results = [False] * len(ranges)
+    grouped = {}
+    for i, plan in enumerate(plans):
+        if plan is not None:
+            grouped.setdefault(plan.method, []).append(i)
+
+    def jobs_for(indices):
+        return [
+            (output_files[i], time_to_seconds(ranges[i][0]), time_to_seconds(ranges[i][1]))
+            for i in indices
+        ]
+
+    if grouped.get('copy'):
+        print(f"Stream-copying {len(grouped['copy'])} range(s) in one pass...")
+        try:
+            slice_ranges_by_copy(input_file, jobs_for(grouped['copy']), packets, file_start, video_stream)
+            for i in grouped['copy']:
+                results[i] = True
+        except subprocess.CalledProcessError as e:
+            print(f"Batch stream copy failed: {e.stderr}")
+
+    if grouped.get('reencode'):
+        print(f"Re-encoding {len(grouped['reencode'])} range(s) with shared decoding...")
+        try:
+            slice_ranges_by_reencode(input_file, jobs_for(grouped['reencode']), has_video, has_audio)
+            for i in grouped['reencode']:
+                results[i] = True
+        except subprocess.CalledProcessError as e:
+            print(f"Batch re-encode failed: {e.stderr}")
+
+    # Smart cuts and output-seek slices run per range with the shared probe
+    for method in ('smart', 'accurate'):
+        for i in grouped.get(method, []):
+            start_time, end_time = ranges[i]
+            results[i] = run_slice_method(method, input_file, output_files[i], start_time, end_time, probe, packets)
+
+    if fallback:
+        for i, plan in enumerate(plans):
+            if not results[i] and plan is not None and plan.fallback:
+                print(f"{output_files[i]}: falling back to method '{plan.fallback}'...")
+                start_time, end_time = ranges[i]
+                results[i] = run_slice_method(plan.fallback, input_file, output_files[i], start_time, end_time, probe, packets)
+
+    print(f"Created {sum(results)} of {len(ranges)} clips.")
+    return results
 
 if __name__ == "__main__":
     # Example usage
@@ -175,6 +771,27 @@ if __name__ == "__main__":
     start_time = "00:18:10"
     end_time = "00:24:10"
     
+    # Batch form, one read of the input for all ranges:
+    #   python vision_1_video_slicer.py input.mp4 --ranges 00:01:00-00:02:00 600-660
+    if "--ranges" in sys.argv:
+        position = sys.argv.index("--ranges")
+        ranges = [tuple(arg.split("-", 1)) for arg in sys.argv[position + 1:]]
+        input_file = sys.argv[1] if position > 1 else input_file
+        
+        results = slice_video_ranges(input_file, ranges)
+        if all(results):
+            print("All clips sliced successfully with audio preserved.")
+        else:
+            print("Some clips failed to slice.")
+        sys.exit(0 if all(results) else 1)
+    
+    # Optional "--method=NAME" flag forces a slicing method
+    method = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--method="):
+            sys.argv.remove(arg)
+            method = arg.split("=", 1)[1]
+    
     if len(sys.argv) > 1:
         input_file = sys.argv[1]
     if len(sys.argv) > 2:
@@ -184,7 +801,7 @@ if __name__ == "__main__":
     if len(sys.argv) > 4:
         end_time = sys.argv[4]
     
-    success = slice_video(input_file, output_file, start_time, end_time)
+    success = slice_video(input_file, output_file, start_time, end_time, method)
     if success:
         print("Video slicing completed successfully with audio preserved.")
     else:
@@ -0,0 +1,256 @@
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import get_keyframe_times
+
+# Inputs picked up when compressing a whole directory
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.mkv', '.avi', '.webm', '.m4v'}
+
+# Chunks shorter than this (seconds) are merged into their neighbour
+MIN_CHUNK_SECONDS = 10.0
+
+
+def plan_chunks(keyframes, duration, chunk_count):
+    """
+    Split a video into chunks of similar length, starting on keyframes.
+
+    Args:
+        keyframes (list): Sorted keyframe times in seconds, relative to the file start
+        duration (float): Duration of the video in seconds
+        chunk_count (int): Number of chunks wanted
+
+    Returns:
+        list: (start, end) tuples in seconds; the last end is None (end of file)
+    """
+    boundaries = [0.0]
+    for i in range(1, chunk_count):
+        target = duration * i / chunk_count
+        nearest = min(keyframes, key=lambda k: abs(k - target), default=None)
+        if nearest is not None and nearest - boundaries[-1] >= MIN_CHUNK_SECONDS \
+                and duration - nearest >= MIN_CHUNK_SECONDS:
+            boundaries.append(nearest)
+
+    return list(zip(boundaries, boundaries[1:] + [None]))
+
+
+def encode_chunk(input_file, chunk_file, start, end, crf, preset, threads, scale=None):
+    """Encodes the video of one keyframe-aligned chunk, without audio."""
+    cmd = ['ffmpeg', '-y', '-ss', f"{start:.6f}", '-i', input_file]
+    if end is not None:
+        cmd += ['-t', f"{end - start:.6f}"]
+    cmd += ['-map', '0:v:0', '-an', '-sn', '-dn']
+    if scale:
+        cmd += ['-vf', f"scale={scale}"]
+    cmd += [
+        '-c:v', 'libx264',
+        '-crf', str(crf),
+        '-preset', preset,
+        '-threads', str(threads),
+        chunk_file
+    ]
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def encode_audio(input_file, audio_file):
+    """Encodes the whole audio track once."""
+    cmd = [
+        'ffmpeg', '-y',
+        '-i', input_file,
+        '-map', '0:a:0',
+        '-vn',
+        '-c:a', 'aac',
+        '-b:a', '128k',
+        audio_file
+    ]
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def submit_chunked_jobs(executor, input_file, temp_dir, workers, crf=28, preset='slow', scale=None):
+    """
+    Plans the chunks of one video and submits their encodes to an executor.
+
+    Returns:
+        tuple: (futures, chunk files, audio file or None)
+    """
+    probe = probe_video(input_file)
+    offset = float(probe['format'].get('start_time', 0) or 0)
+    duration = float(probe['format'].get('duration', 0) or 0)
+    keyframes = [t - offset for t in get_keyframe_times(input_file, get_packet_index(input_file))]
+
+    chunks = plan_chunks(keyframes, duration, workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    futures = []
+    chunk_files = []
+    for i, (start, end) in enumerate(chunks):
+        chunk_file = os.path.join(temp_dir, f"chunk_{i:04d}.mp4")
+        chunk_files.append(chunk_file)
+        futures.append(executor.submit(
+            encode_chunk, input_file, chunk_file, start, end, crf, preset, threads, scale
+        ))
+
+    audio_file = None
+    if any(stream['codec_type'] == 'audio' for stream in probe['streams']):
+        audio_file = os.path.join(temp_dir, "audio.m4a")
+        futures.append(executor.submit(encode_audio, input_file, audio_file))
+
+    print(f"{input_file}: {len(chunks)} chunk(s) queued")
+    return futures, chunk_files, audio_file
+
+
+def join_chunks(chunk_files, audio_file, output_file, temp_dir):
+    """Losslessly concatenates encoded chunks and muxes the audio track."""
+    concat_list = os.path.join(temp_dir, "concat_list.txt")
+    with open(concat_list, 'w') as f:
+        for chunk_file in chunk_files:
+            f.write(f"file '{chunk_file}'\n")
+
+    cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_list]
+    if audio_file:
+        cmd += ['-i', audio_file, '-map', '0:v:0', '-map', '1:a:0']
+    cmd += ['-c', 'copy', '-movflags', '+faststart', output_file]
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def compress_video_chunked(input_file, output_file, workers=None, crf=28, preset='slow', scale=None):
+    """
+    Compresses a video by encoding keyframe-aligned chunks in parallel.
+
+    The input is split at keyframes into one chunk per worker. The chunks
+    are encoded concurrently (each encode is an ffmpeg process with its
+    share of the cores), the audio is encoded once alongside them, and the
+    results are concatenated without re-encoding.
+
+    Args:
+        input_file (str): Path to the input video file
+        output_file (str): Path to save the output video
+        workers (int): Number of concurrent encodes (defaults to the CPU count)
+        crf (int): libx264 quality (18-28 is good for size reduction)
+        preset (str): libx264 preset, slower = better compression
+        scale (str): Optional scale filter size, e.g. "1280:-2"
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: Input file '{input_file}' does not exist")
+        return False
+
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures, chunk_files, audio_file = submit_chunked_jobs(
+                executor, input_file, temp_dir, workers, crf, preset, scale
+            )
+            for future in futures:
+                future.result()
+
+            print("Concatenating chunks...")
+            join_chunks(chunk_files, audio_file, output_file, temp_dir)
+    except subprocess.CalledProcessError as e:
+        print(f"Encoding failed: {e.stderr}")
+        return False
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        return False
+
+    print(f"Successfully created {output_file}")
+    return True
+
+
+def compress_directory(input_dir, output_dir, workers=None, crf=28, preset='slow', scale=None):
+    """
+    Compresses every video of a directory under one global concurrency limit.
+
+    The chunks of all files share one pool of `workers` encodes, so short
+    files fill the gaps left by long ones.
+
+    Args:
+        input_dir (str): Directory with the input videos
+        output_dir (str): Directory for the compressed videos (created if missing)
+        workers (int): Number of concurrent encodes (defaults to the CPU count)
+        crf (int): libx264 quality
+        preset (str): libx264 preset
+        scale (str): Optional scale filter size, e.g. "1280:-2"
+
+    Returns:
+        dict: Input path -> True/False (empty if output_dir is input_dir)
+    """
+    # Outputs keep the input names: in the same directory they would overwrite their sources
+    if os.path.realpath(output_dir) == os.path.realpath(input_dir):
+        print(f"Error: Output directory '{output_dir}' must differ from the input directory")
+        return {}
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    inputs = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_root, ThreadPoolExecutor(max_workers=workers) as executor:
+        # Queue the chunks of every file first so the pool never runs dry
+        jobs = []
+        for i, input_file in enumerate(inputs):
+            temp_dir = os.path.join(temp_root, f"{i:04d}")
+            os.makedirs(temp_dir)
+            try:
+                jobs.append((input_file, temp_dir, *submit_chunked_jobs(
+                    executor, input_file, temp_dir, workers, crf, preset, scale
+                )))
+            except Exception as e:
+                print(f"{input_file}: planning failed: {str(e)}")
+                results[input_file] = False
+
+        for input_file, temp_dir, futures, chunk_files, audio_file in jobs:
+            output_file = os.path.join(output_dir, os.path.basename(input_file))
+            try:
+                for future in futures:
+                    future.result()
+                join_chunks(chunk_files, audio_file, output_file, temp_dir)
+                print(f"Successfully created {output_file}")
+                results[input_file] = True
+            except subprocess.CalledProcessError as e:
+                print(f"{input_file}: encoding failed: {e.stderr}")
+                results[input_file] = False
+            except Exception as e:
+                print(f"{input_file}: an unexpected error occurred: {str(e)}")
+                results[input_file] = False
+
+    return results
+
+
+if __name__ == "__main__":
+    # Example usage
+    input_path = "input.mp4"
+    output_path = "output.mp4"
+
+    # Optional "--workers=N" flag limits the number of concurrent encodes
+    workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            sys.argv.remove(arg)
+            workers = int(arg.split("=", 1)[1])
+
+    if len(sys.argv) > 1:
+        input_path = sys.argv[1]
+    if len(sys.argv) > 2:
+        output_path = sys.argv[2]
+
+    if os.path.isdir(input_path):
+        results = compress_directory(input_path, output_path, workers)
+        success = bool(results) and all(results.values())
+    else:
+        success = compress_video_chunked(input_path, output_path, workers)
+
+    if success:
+        print("Video compression completed successfully!")
+    else:
+        print("Video compression failed.")
@@ -2,16 +2,104 @@ import ffmpeg
 import subprocess
 import os
 import tempfile
+from bisect import bisect_left
 
-def cut_and_concat_video(input_file, output_file, cut_start, cut_end):
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import get_frame_tolerance, get_keyframe_times, time_to_seconds
+
+def get_keep_segments(cut_ranges, duration=None):
+    """
+    Turns the ranges to remove into the ranges to keep.
+
+    Args:
+        cut_ranges (list): (start, end) tuples to remove, in "HH:MM:SS" or seconds
+        duration (float): Length of the video in seconds; when given, nothing
+            is kept after a cut that runs to (or past) the end
+
+    Returns:
+        list: Sorted (start, end) tuples in seconds to keep; the last end is
+            None, meaning the end of the video
+
+    Raises:
+        ValueError: If a cut range is empty or inverted
+    """
+    ranges = [(time_to_seconds(s), time_to_seconds(e)) for s, e in cut_ranges]
+    for (start, end), (start_time, end_time) in zip(ranges, cut_ranges):
+        if start >= end:
+            raise ValueError(f"Empty or inverted cut range: {start_time} - {end_time}")
+
+    # Sort and merge overlapping ranges
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    keep = []
+    position = 0.0
+    for start, end in merged:
+        if start > position:
+            keep.append((position, start))
+        position = max(position, end)
+    if duration is None or position < duration:
+        keep.append((position, None))
+    return keep
+
+def trim_and_concat(input_file, output_file, keep_segments, has_audio):
+    """
+    Re-encodes the kept parts of a video, trimmed frame-accurately from one decode.
+
+    Args:
+        input_file (str): Path to the input video file
+        output_file (str): Path to save the output video
+        keep_segments (list): (start, end) tuples in seconds, from get_keep_segments
+        has_audio (bool): Whether the input has an audio stream
+    """
+    # Trim every kept part from a single decode of the input
+    input_stream = ffmpeg.input(input_file)
+    parts = []
+    for start, end in keep_segments:
+        trim_args = {'start': start} if end is None else {'start': start, 'end': end}
+        parts.append(input_stream.video.trim(**trim_args).setpts('PTS-STARTPTS'))
+        if has_audio:
+            parts.append(
+                input_stream.audio
+                .filter_('atrim', **trim_args)
+                .filter_('asetpts', 'PTS-STARTPTS')
+            )
+    
+    # Join video (and audio) parts
+    joined = ffmpeg.concat(*parts, v=1, a=1 if has_audio else 0).node
+    
+    if has_audio:
+        # Output with joined video and audio
+        output = ffmpeg.output(joined[0], joined[1], output_file)
+    else:
+        # Output with only joined video
+        output = ffmpeg.output(joined[0], output_file)
+    
+    # Run ffmpeg
+    output.global_args('-y').run(capture_stderr=True)
+
+def cut_and_concat_video(input_file, output_file, cut_start=None, cut_end=None, cut_ranges=None):
     """
-    Removes a specific segment from a video and concatenates the parts before and after.
+    Removes segments from a video and concatenates the remaining parts.
+
+    The result is built in one pass straight from the source: when every
+    kept part starts on a keyframe, the concat demuxer reads the kept parts
+    of the input through inpoint/outpoint entries (stream copy), so no
+    intermediate copies of the video are written. Otherwise the parts are
+    trimmed frame-accurately and re-encoded, since a copy would start each
+    part at the keyframe before it.
     
     Args:
         input_file (str): Path to the input video file
         output_file (str): Path to save the output video
         cut_start (str): Start time of segment to remove in format "HH:MM:SS" or seconds
         cut_end (str): End time of segment to remove in format "HH:MM:SS" or seconds
+        cut_ranges (list): (start, end) tuples of segments to remove, used
+            instead of cut_start/cut_end to remove several segments at once
         
     Returns:
         bool: True if successful, False otherwise
@@ -21,41 +109,57 @@ def cut_and_concat_video(input_file, output_file, cut_start, cut_end):
         print(f"Error: Input file '{input_file}' does not exist")
         return False
     
+    if cut_ranges is None:
+        cut_ranges = [(cut_start, cut_end)]
+
     try:
-        # Create temporary directory for intermediate files
+        # Get file info for the start offset and to check streams
+        probe = probe_video(input_file)
+
+        # Concat demuxer in/out points are absolute timestamps of the file
+        offset = float(probe['format'].get('start_time', 0) or 0)
+        duration = float(probe['format']['duration']) if 'duration' in probe['format'] else None
+        try:
+            keep_segments = get_keep_segments(cut_ranges, duration)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return False
+        if not keep_segments:
+            print("Error: The cut ranges remove the whole video")
+            return False
+
+        has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
+        video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+
+        # Stream copy starts every part at a keyframe: only use it when the
+        # kept parts really start on one, otherwise trim and re-encode
+        if video_stream is not None:
+            keyframes = [t - offset for t in get_keyframe_times(input_file, get_packet_index(input_file))]
+            epsilon = get_frame_tolerance(video_stream)
+            for start, _ in keep_segments:
+                i = bisect_left(keyframes, start - epsilon)
+                if start > epsilon and not (i < len(keyframes) and keyframes[i] <= start + epsilon):
+                    print(f"A kept part starts between keyframes ({start:.3f}s), re-encoding...")
+                    trim_and_concat(input_file, output_file, keep_segments, has_audio)
+                    print(f"Successfully created {output_file}")
+                    return True
+
+        # Only the small concat list goes to the temporary directory
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Temp file paths
-            first_part = os.path.join(temp_dir, "first_part.mp4")
-            second_part = os.path.join(temp_dir, "second_part.mp4")
             concat_list = os.path.join(temp_dir, "concat_list.txt")
+            source = os.path.abspath(input_file)
             
-            # 1. Extract the first part (from beginning to cut_start)
-            print(f"Extracting first part (0 to {cut_start})...")
-            (
-                ffmpeg
-                .input(input_file, to=cut_start)
-                .output(first_part, c='copy')
-                .global_args('-y')
-                .run(capture_stderr=True)
-            )
-            
-            # 2. Extract the second part (from cut_end to end)
-            print(f"Extracting second part (from {cut_end} to end)...")
-            (
-                ffmpeg
-                .input(input_file, ss=cut_end)
-                .output(second_part, c='copy')
-                .global_args('-y')
-                .run(capture_stderr=True)
-            )
-            
-            # 3. Create a concat file
+            # 1. Create a concat file that points into the source
             with open(concat_list, 'w') as f:
-                f.write(f"file '{first_part}'\n")
-                f.write(f"file '{second_part}'\n")
+                for start, end in keep_segments:
+                    f.write(f"file '{source}'\n")
+                    if start > 0:
+                        f.write(f"inpoint {start + offset:.6f}\n")
+                    if end is not None:
+                        f.write(f"outpoint {end + offset:.6f}\n")
             
-            # 4. Concatenate the parts
-            print("Concatenating parts...")
+            # 2. Concatenate the kept parts
+            print(f"Concatenating {len(keep_segments)} kept part(s)...")
             cmd = [
                 'ffmpeg',
                 '-y',
@@ -76,35 +180,7 @@ def cut_and_concat_video(input_file, output_file, cut_start, cut_end):
                 
                 # Try alternative approach if first method fails
                 print("Trying alternative approach...")
-                
-                # Get file info to check streams
-                probe = ffmpeg.probe(input_file)
-                
-                # Check if file has audio
-                has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
-                
-                # Create inputs
-                input1 = ffmpeg.input(first_part)
-                input2 = ffmpeg.input(second_part)
-                
-                # Join video streams
-                v1 = input1.video
-                v2 = input2.video
-                joined_video = ffmpeg.concat(v1, v2, v=1, a=0)
-                
-                # Join audio streams if present
-                if has_audio:
-                    a1 = input1.audio
-                    a2 = input2.audio
-                    joined_audio = ffmpeg.concat(a1, a2, v=0, a=1)
-                    # Output with joined video and audio
-                    output = ffmpeg.output(joined_video, joined_audio, output_file)
-                else:
-                    # Output with only joined video
-                    output = ffmpeg.output(joined_video, output_file)
-                
-                # Run ffmpeg
-                output.global_args('-y').run(capture_stderr=True)
+                trim_and_concat(input_file, output_file, keep_segments, has_audio)
                 
                 print(f"Alternative method successful: Created {output_file}")
                 return True
@@ -135,7 +211,12 @@ if __name__ == "__main__":
     if len(sys.argv) > 4:
         cut_end = sys.argv[4]
     
-    success = cut_and_concat_video(input_file, output_file, cut_start, cut_end)
+    # Further start/end pairs remove more segments in the same pass:
+    #   python vision_4_script_name.py input.mp4 out.mp4 00:01:00 00:02:00 00:05:00 00:06:00
+    times = [cut_start, cut_end] + sys.argv[5:]
+    cut_ranges = list(zip(times[0::2], times[1::2]))
+
+    success = cut_and_concat_video(input_file, output_file, cut_ranges=cut_ranges)
     if success:
         print("Video processing completed successfully!")
     else:
@@ -2,8 +2,202 @@ import ffmpeg
 import subprocess
 import os
 import tempfile
+from bisect import bisect_right
 
-def insert_video_at_time(main_video, insert_video, output_file, insert_time):
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import (
+    get_copy_end,
+    get_frame_tolerance,
+    get_keyframe_times,
+    get_matching_encoder_args,
+    time_to_seconds,
+)
+
+# ffprobe audio codec names -> encoders producing the same codec
+AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'vorbis': 'libvorbis',
+    'ac3': 'ac3',
+    'eac3': 'eac3',
+    'flac': 'flac',
+}
+
+def get_matching_audio_args(audio_stream):
+    """
+    Build encoder arguments that reproduce the parameters of an audio stream.
+
+    Args:
+        audio_stream (dict): Audio stream entry from probe_video
+
+    Returns:
+        list: FFmpeg arguments, or None if the codec cannot be matched
+    """
+    encoder = AUDIO_ENCODERS.get(audio_stream.get('codec_name'))
+    if encoder is None:
+        return None
+
+    args = ['-c:a', encoder]
+    if audio_stream.get('sample_rate'):
+        args += ['-ar', str(audio_stream['sample_rate'])]
+    if audio_stream.get('channels'):
+        args += ['-ac', str(audio_stream['channels'])]
+    if str(audio_stream.get('bit_rate', '')).isdigit():
+        args += ['-b:a', str(audio_stream['bit_rate'])]
+    return args
+
+def smart_insert_video(main_video, insert_video, output_file, insert_time):
+    """
+    Inserts a video clip without re-encoding the main video.
+
+    Only the clip is encoded, conformed to the main video's codec parameters
+    (codec, profile, size, frame rate, pixel format, time base and audio
+    format), plus the frames of the single GOP around the insert point. The
+    rest of the main video is stream-copied through concat-demuxer
+    inpoint/outpoint entries, so the cost scales with the clip length.
+
+    Args:
+        main_video (str): Path to the main video file
+        insert_video (str): Path to the video clip to insert
+        output_file (str): Path to save the resulting video
+        insert_time (str): Position to insert the clip in format "HH:MM:SS" or seconds
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    main_probe = probe_video(main_video)
+    insert_probe = probe_video(insert_video)
+
+    video_stream = next((s for s in main_probe['streams'] if s['codec_type'] == 'video'), None)
+    audio_stream = next((s for s in main_probe['streams'] if s['codec_type'] == 'audio'), None)
+    if video_stream is None:
+        print("Smart insert needs a main video with a video stream")
+        return False
+
+    video_args = get_matching_encoder_args(video_stream)
+    if video_args is None:
+        print(f"Smart insert does not support codec '{video_stream.get('codec_name')}'")
+        return False
+
+    audio_args = None
+    if audio_stream is not None:
+        audio_args = get_matching_audio_args(audio_stream)
+        if audio_args is None:
+            print(f"Smart insert does not support audio codec '{audio_stream.get('codec_name')}'")
+            return False
+
+    packets = get_packet_index(main_video)
+    offset = float(main_probe['format'].get('start_time', 0) or 0)
+    keyframes = [t - offset for t in get_keyframe_times(main_video, packets)]
+    epsilon = get_frame_tolerance(video_stream)
+    position = time_to_seconds(insert_time)
+
+    # The GOP containing the insert point: [gop_start, gop_end)
+    index = bisect_right(keyframes, position + epsilon) - 1
+    gop_start = keyframes[index] if index >= 0 else 0.0
+    gop_end = keyframes[index + 1] if index + 1 < len(keyframes) else None
+    on_keyframe = index >= 0 and abs(position - gop_start) <= epsilon
+
+    # Copy up to the GOP start and re-encode from the earliest frame decoded
+    # after it, which is only a few B-frames when inserting on a keyframe
+    head_outpoint, head_start = get_copy_end(packets, gop_start, offset, epsilon)
+
+    # Pieces keep the main video's stream order so the concat demuxer pairs them up
+    stream_maps = ['-map', '0:v:0']
+    if audio_stream is not None:
+        stream_maps = ['-map', '0:a:0', '-map', '0:v:0'] if audio_stream['index'] < video_stream['index'] \
+            else ['-map', '0:v:0', '-map', '0:a:0']
+    conform_args = [*stream_maps, *video_args, *(audio_args or []), '-sn', '-dn']
+
+    width, height = video_stream['width'], video_stream['height']
+    frame_rate = video_stream.get('avg_frame_rate')
+    if frame_rate in (None, '0/0'):
+        frame_rate = video_stream['r_frame_rate']
+    source = os.path.abspath(main_video)
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            concat_list = os.path.join(temp_dir, "concat_list.txt")
+            entries = []
+
+            def encode_main_piece(name, piece_start, piece_end):
+                piece = os.path.join(temp_dir, name)
+                cmd = ['ffmpeg', '-y', '-ss', f"{piece_start:.6f}", '-i', main_video]
+                if piece_end is not None:
+                    cmd += ['-t', f"{piece_end - piece_start:.6f}"]
+                subprocess.run(cmd + conform_args + [piece], capture_output=True, text=True, check=True)
+                return piece
+
+            # 1. Main video up to the insert point
+            if gop_start > epsilon:
+                entries.append(f"file '{source}'\noutpoint {head_outpoint:.6f}\n")
+            if position - head_start > epsilon:
+                print(f"Re-encoding main video from {head_start:.3f}s to {position:.3f}s...")
+                entries.append(f"file '{encode_main_piece('head.mp4', head_start, position)}'\n")
+
+            # 2. The clip, conformed to the main video's parameters
+            print("Conforming insert video to the main video's parameters...")
+            conformed = os.path.join(temp_dir, "conformed_insert.mp4")
+            cmd = ['ffmpeg', '-y', '-i', insert_video]
+            insert_has_audio = any(s['codec_type'] == 'audio' for s in insert_probe['streams'])
+            if audio_stream is not None and not insert_has_audio:
+                # Silent track so every piece has the same streams
+                layout = audio_stream.get('channel_layout') or 'stereo'
+                cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={audio_stream['sample_rate']}:cl={layout}", '-shortest']
+                conform_maps = [m.replace('0:a:0', '1:a:0') for m in conform_args]
+            else:
+                conform_maps = conform_args
+            # In a filter string "N:M" would be read as sar=N:max=M; pass a ratio
+            sar = video_stream.get('sample_aspect_ratio', '1:1')
+            sar = '1/1' if sar in ('0:1', 'N/A') else sar.replace(':', '/')
+            video_filter = (
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+                f"setsar={sar},"
+                f"fps={frame_rate}"
+            )
+            cmd += ['-vf', video_filter] + conform_maps + [conformed]
+            subprocess.run(cmd, capture_output=True, text=True, check=True)
+            entries.append(f"file '{conformed}'\n")
+
+            # 3. Main video from the insert point on
+            if on_keyframe:
+                entries.append(f"file '{source}'\ninpoint {gop_start + offset:.6f}\n")
+            else:
+                print(f"Re-encoding main video from {position:.3f}s to the next keyframe...")
+                entries.append(f"file '{encode_main_piece('tail.mp4', position, gop_end)}'\n")
+                if gop_end is not None:
+                    entries.append(f"file '{source}'\ninpoint {gop_end + offset:.6f}\n")
+
+            with open(concat_list, 'w') as f:
+                f.writelines(entries)
+
+            print("Concatenating parts...")
+            cmd = [
+                'ffmpeg',
+                '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_list,
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                '-c', 'copy',
+                output_file
+            ]
+
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Smart insert concatenation failed: {result.stderr}")
+                return False
+    except subprocess.CalledProcessError as e:
+        print(f"Smart insert encoding failed: {e.stderr}")
+        return False
+
+    print(f"Smart insert successful: Created {output_file}")
+    return True
+
+def insert_video_at_time(main_video, insert_video, output_file, insert_time, method=None):
     """
     Inserts a video clip at a specific time position in the main video.
     
@@ -12,6 +206,8 @@ def insert_video_at_time(main_video, insert_video, output_file, insert_time):
         insert_video (str): Path to the video clip to insert
         output_file (str): Path to save the resulting video
         insert_time (str): Position to insert the clip in format "HH:MM:SS" or seconds
+        method (str): "smart" to insert without re-encoding the main video,
+            falling back to the full re-encode below if that fails
         
     Returns:
         bool: True if successful, False otherwise
@@ -23,6 +219,17 @@ def insert_video_at_time(main_video, insert_video, output_file, insert_time):
         print(f"Error: Insert video '{insert_video}' does not exist")
         return False
     
+    if method == 'smart':
+        try:
+            if smart_insert_video(main_video, insert_video, output_file, insert_time):
+                return True
+        except (ffmpeg.Error, subprocess.CalledProcessError) as e:
+            error_msg = e.stderr.decode('utf8') if isinstance(e.stderr, bytes) else str(e.stderr or e)
+            print(f"Smart insert failed: {error_msg}")
+        except Exception as e:
+            print(f"Smart insert failed: {str(e)}")
+        print("Falling back to re-encoding the whole video...")
+    
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
             first_part = os.path.join(temp_dir, "first_part.mp4")
@@ -132,6 +339,12 @@ if __name__ == "__main__":
     output_file = "insert_video.mp4"
     insert_time = "00:00:10"  # Position to insert the clip
     
+    # Optional "--smart" flag inserts without re-encoding the main video
+    method = None
+    if "--smart" in sys.argv:
+        sys.argv.remove("--smart")
+        method = "smart"
+    
     if len(sys.argv) > 1:
         main_video = sys.argv[1]
     if len(sys.argv) > 2:
@@ -141,7 +354,7 @@ if __name__ == "__main__":
     if len(sys.argv) > 4:
         insert_time = sys.argv[4]
     
-    success = insert_video_at_time(main_video, insert_video, output_file, insert_time)
+    success = insert_video_at_time(main_video, insert_video, output_file, insert_time, method)
     if success:
         print("Video insertion completed successfully!")
     else:
@@ -0,0 +1,180 @@
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from detr_detector import BACKENDS, MODEL_PATH, SHORTEST_EDGE, THRESHOLD, DetrDetector
+from track_detect import iou_matrix
+
+PICTURES_DIR = "./pictures"
+
+# Input resolutions tried for every backend
+SIZES = (SHORTEST_EDGE, 600, 480)
+
+# Timed runs per measurement, after one warm-up run
+RUNS = 5
+
+# Copies of the first picture in the throughput batch
+BATCH_SIZE = 4
+
+# Detections overlapping a reference box at least this much are true positives
+MATCH_IOU = 0.5
+
+
+def load_pictures(folder=PICTURES_DIR):
+    """Load every image of a folder as an RGB numpy array, sorted by name."""
+    images = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+            with Image.open(os.path.join(folder, name)) as image:
+                images.append(np.asarray(image.convert('RGB')))
+    return images
+
+
+def average_precision(predictions, references, iou=MATCH_IOU):
+    """
+    Mean average precision of predictions against reference detections.
+
+    The fp32 eager detections serve as ground truth, so the result measures
+    how far a backend drifts from the reference model, not its accuracy on
+    real annotations. AP is the VOC all-point interpolated area under the
+    precision-recall curve, averaged over the labels present in the
+    references.
+
+    Args:
+        predictions (list): One (scores, labels, boxes) tuple per image
+        references (list): One (scores, labels, boxes) tuple per image
+        iou (float): Overlap needed for a prediction to match a reference box
+
+    Returns:
+        float: mAP between 0 and 1 (1 when nothing is referenced nor predicted)
+    """
+    labels = {int(label) for _, ref_labels, _ in references for label in ref_labels}
+    if not labels:
+        return 1.0 if not any(len(scores) for scores, _, _ in predictions) else 0.0
+
+    precisions = []
+    for label in sorted(labels):
+        hits = []
+        total = 0
+        for (scores, pred_labels, pred_boxes), (_, ref_labels, ref_boxes) in zip(predictions, references):
+            pred = pred_labels == label
+            ref = ref_boxes[ref_labels == label]
+            total += len(ref)
+            overlaps = iou_matrix(pred_boxes[pred], ref) if len(ref) else None
+            matched = set()
+            for i in np.argsort(-scores[pred]):
+                best = -1
+                if overlaps is not None:
+                    candidates = [j for j in np.argsort(-overlaps[i]) if j not in matched]
+                    if candidates and overlaps[i, candidates[0]] >= iou:
+                        best = candidates[0]
+                        matched.add(best)
+                hits.append((float(scores[pred][i]), best >= 0))
+
+        hits.sort(key=lambda hit: -hit[0])
+        true_positives = np.cumsum([hit for _, hit in hits])
+        recall = np.concatenate([[0.0], true_positives / total, [1.0]])
+        precision = np.concatenate([[1.0], true_positives / np.arange(1, len(hits) + 1), [0.0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        changes = np.nonzero(np.diff(recall))[0]
+        precisions.append(float(np.sum((recall[changes + 1] - recall[changes]) * precision[changes + 1])))
+
+    return statistics.mean(precisions)
+
+
+def time_runs(fn, runs=RUNS):
+    """Median wall time of `runs` calls of fn, after one warm-up call."""
+    fn()
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def benchmark(backends=BACKENDS, sizes=SIZES, folder=PICTURES_DIR, threads=None, batch_size=BATCH_SIZE):
+    """
+    Compare detection backends and input sizes against the fp32 model.
+
+    For every backend and size, reports the median latency of one image,
+    the throughput of a batch of `batch_size` copies of the first image,
+    and the mAP of its detections on all pictures with the fp32 eager
+    detections at full size as the reference (drift = 1 - mAP).
+
+    Args:
+        backends (tuple): Backends to compare, see detr_detector.BACKENDS
+        sizes (tuple): Shortest-edge input sizes to try
+        folder (str): Folder of the test pictures
+        threads (int): Intra-op threads for inference
+        batch_size (int): Images per throughput batch
+
+    Returns:
+        list: One dict per (backend, size) with latency_ms, images_per_s, map and drift
+    """
+    images = load_pictures(folder)
+    if not images:
+        print(f"Error: No images found in {folder}")
+        return []
+    print(f"{len(images)} pictures from {folder}")
+
+    reference_detector = DetrDetector(MODEL_PATH, THRESHOLD, threads)
+    references = [reference_detector.detect_images([image])[0] for image in images]
+    del reference_detector
+
+    results = []
+    for backend in backends:
+        for size in sizes:
+            try:
+                detector = DetrDetector(MODEL_PATH, THRESHOLD, threads, backend=backend, shortest_edge=size)
+            except ImportError as e:
+                print(f"Skipping {backend}: {e}")
+                break
+
+            first = images[0]
+            single = [detector.preprocess(first)]
+            batch = single * batch_size
+            latency = time_runs(lambda: detector.detect(single, first.shape[:2]))
+            batch_time = time_runs(lambda: detector.detect(batch, first.shape[:2]))
+
+            predictions = [detector.detect_images([image])[0] for image in images]
+            score = average_precision(predictions, references)
+
+            result = {
+                'backend': backend, 'size': size, 'latency_ms': latency * 1000,
+                'images_per_s': batch_size / batch_time, 'map': score, 'drift': 1 - score,
+            }
+            results.append(result)
+            print(f"{backend:>12} {size:>5}px  {result['latency_ms']:8.1f} ms  "
+                  f"{result['images_per_s']:6.2f} img/s  mAP@{MATCH_IOU} {score:.3f}")
+
+    baseline = next((r for r in results if r['backend'] == 'eager' and r['size'] == SHORTEST_EDGE), None)
+    if baseline:
+        print("\nThroughput relative to fp32 eager at full size:")
+        for result in results:
+            print(f"{result['backend']:>12} {result['size']:>5}px  "
+                  f"x{result['images_per_s'] / baseline['images_per_s']:.2f}  drift {result['drift']:.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python benchmark_backends.py --backends=eager,int8,onnx --sizes=800,600 --threads=8
+    options = {'backends': ','.join(BACKENDS), 'sizes': ','.join(str(size) for size in SIZES),
+               'threads': None, 'batch': BATCH_SIZE, 'pictures': PICTURES_DIR}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            options[name] = int(value) if name in ('threads', 'batch') else value
+
+    benchmark(
+        backends=tuple(options['backends'].split(',')),
+        sizes=tuple(int(size) for size in options['sizes'].split(',')),
+        folder=options['pictures'],
+        threads=options['threads'],
+        batch_size=options['batch'],
+    )
@@ -0,0 +1,181 @@
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+# Where detect_server.py listens by default: a Unix socket path, or "host:port"
+DEFAULT_ADDRESS = os.environ.get(
+    "VISION_DETECT_ADDRESS", os.path.join(tempfile.gettempdir(), "vision_detect.sock")
+)
+
+# Messages are a 4-byte big-endian header length, a JSON header, then
+# header["size"] bytes of payload (raw frames only)
+_LENGTH = struct.Struct('>I')
+
+
+def _connect(address, timeout=None):
+    """Open a stream socket to a Unix socket path or a "host:port" address."""
+    host, _, port = address.rpartition(':')
+    if port.isdigit() and os.path.sep not in address:
+        sock = socket.create_connection((host or '127.0.0.1', int(port)), timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    return sock
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, payload=b''):
+    """Send a JSON header and an optional binary payload."""
+    if payload:
+        header = dict(header, size=len(payload))
+    data = json.dumps(header).encode('utf8')
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """
+    Receive one message.
+
+    Returns:
+        tuple: (header dict, payload bytes), or None if the peer closed the connection
+    """
+    length = _recv_exact(sock, _LENGTH.size)
+    if length is None:
+        return None
+    header = json.loads(_recv_exact(sock, _LENGTH.unpack(length)[0]))
+    payload = _recv_exact(sock, header['size']) if header.get('size') else b''
+    return header, payload
+
+
+class DetectionClient:
+    """
+    Client of the warm detection server (detect_server.py).
+
+    Only the standard library is imported: the client starts instantly and
+    the model stays loaded in the server between runs. One connection can
+    be reused for any number of requests.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None, autostart=False):
+        """
+        Args:
+            address (str): Unix socket path, or "host:port"
+            timeout (float): Socket timeout in seconds (None waits forever)
+            autostart (bool): Start a server in the background if none is listening
+        """
+        self.address = address
+        try:
+            self.sock = _connect(address, timeout)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not autostart:
+                raise
+            start_server(address)
+            self.sock = _connect(address, timeout)
+
+    def _request(self, header, payload=b''):
+        send_message(self.sock, header, payload)
+        message = recv_message(self.sock)
+        if message is None:
+            raise ConnectionError("Detection server closed the connection")
+        response = message[0]
+        if 'error' in response:
+            raise RuntimeError(f"Detection failed: {response['error']}")
+        return response
+
+    def ping(self):
+        """Check that the server is up and its model is loaded."""
+        return self._request({'op': 'ping'})
+
+    def detect_path(self, image_path):
+        """
+        Detect objects on an image file (read by the server).
+
+        Returns:
+            list: Dicts with "label", "score" and "box" (x_min, y_min, x_max, y_max)
+        """
+        return self._request({'op': 'detect', 'path': os.path.abspath(image_path)})['detections']
+
+    def detect_frame(self, frame, bgr=True):
+        """
+        Detect objects on a raw frame, e.g. from cv2.VideoCapture.
+
+        Args:
+            frame (numpy.ndarray): uint8 array of shape (height, width, 3)
+            bgr (bool): True for OpenCV's BGR channel order, False for RGB
+
+        Returns:
+            list: Dicts with "label", "score" and "box" (x_min, y_min, x_max, y_max)
+        """
+        header = {'op': 'detect', 'shape': list(frame.shape), 'channels': 'bgr' if bgr else 'rgb'}
+        return self._request(header, frame.tobytes())['detections']
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def start_server(address=DEFAULT_ADDRESS, wait=120):
+    """
+    Start detect_server.py in the background and wait until its model is loaded.
+
+    Args:
+        address (str): Address the server should listen on
+        wait (float): Seconds to wait for the server
+
+    Returns:
+        subprocess.Popen: The server process
+    """
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detect_server.py")
+    process = subprocess.Popen([sys.executable, server, f"--address={address}"],
+                               cwd=os.path.dirname(server), start_new_session=True)
+
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Detection server exited with code {process.returncode}")
+        try:
+            with _connect(address, timeout=wait) as sock:
+                send_message(sock, {'op': 'ping'})
+                if recv_message(sock) is not None:
+                    return process
+        except OSError:
+            # Not listening yet (no socket file, refused, timed out while binding)
+            time.sleep(0.2)
+    process.kill()
+    raise TimeoutError(f"Detection server did not start within {wait} seconds")
+
+
+if __name__ == "__main__":
+    # Example usage: python detect_client.py pictures/img_1.jpg
+    image_path = sys.argv[1] if len(sys.argv) > 1 else "./pictures/img_1.jpg"
+
+    with DetectionClient(autostart=True) as client:
+        started = time.time()
+        detections = client.detect_path(image_path)
+        print(f"Detected objects ({(time.time() - started) * 1000:.0f} ms):")
+        for detection in detections:
+            box = [round(v, 2) for v in detection["box"]]
+            print(f"- {detection['label']} (confidence: {round(detection['score'] * 100, 2)}%) at {box}")
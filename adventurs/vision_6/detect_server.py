@@ -0,0 +1,181 @@
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from detect_client import DEFAULT_ADDRESS, recv_message, send_message
+from detr_detector import MODEL_PATH, SHORTEST_EDGE, THRESHOLD, DetrDetector
+
+# Requests run together in one batch, and how long the first one waits for company
+MAX_BATCH = 8
+MAX_WAIT = 0.003
+
+
+class MicroBatcher:
+    """
+    Groups concurrent detection requests into model batches.
+
+    Requests are preprocessed on their connection threads; a single
+    inference thread takes whatever is queued (up to `max_batch`, waiting at
+    most `max_wait` seconds for more after the first) and runs it as one
+    batch. Frames whose preprocessed shapes differ run as separate batches.
+    """
+
+    def __init__(self, detector, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, pixel_values, image_size):
+        """
+        Queue one preprocessed image and wait for its detections.
+
+        Returns:
+            tuple: (scores, labels, boxes) numpy arrays, see DetrDetector.detect
+        """
+        slot = {'done': threading.Event()}
+        self.requests.put((pixel_values, image_size, slot))
+        slot['done'].wait()
+        if 'error' in slot:
+            raise slot['error']
+        return slot['result']
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(tuple(request[0].shape), []).append(request)
+
+            for requests in groups.values():
+                try:
+                    results = self.detector.detect(
+                        [pixel_values for pixel_values, _, _ in requests],
+                        [image_size for _, image_size, _ in requests]
+                    )
+                    for (_, _, slot), result in zip(requests, results):
+                        slot['result'] = result
+                except Exception as e:
+                    for _, _, slot in requests:
+                        slot['error'] = e
+                finally:
+                    for _, _, slot in requests:
+                        slot['done'].set()
+
+
+def load_request_image(header, payload):
+    """Turn a request into an RGB numpy array: an image path or a raw frame."""
+    if 'path' in header:
+        with Image.open(header['path']) as image:
+            return np.asarray(image.convert('RGB'))
+
+    frame = np.frombuffer(payload, np.uint8).reshape(header['shape'])
+    if header.get('channels', 'bgr') == 'bgr':
+        frame = np.ascontiguousarray(frame[:, :, ::-1])
+    return frame
+
+
+class DetectionHandler(socketserver.StreamRequestHandler):
+    """Serves detection requests on one client connection until it closes."""
+
+    def handle(self):
+        batcher = self.server.batcher
+        detector = batcher.detector
+        while True:
+            message = recv_message(self.request)
+            if message is None:
+                return
+            header, payload = message
+
+            try:
+                if header.get('op') == 'ping':
+                    response = {'ok': True}
+                else:
+                    image = load_request_image(header, payload)
+                    scores, labels, boxes = batcher.submit(detector.preprocess(image), tuple(image.shape[:2]))
+                    response = {'detections': [
+                        {'label': detector.labels[int(label)], 'score': float(score), 'box': box.tolist()}
+                        for score, label, box in zip(scores, labels, boxes)
+                    ]}
+            except Exception as e:
+                response = {'error': str(e)}
+            send_message(self.request, response)
+
+
+class UnixDetectionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TCPDetectionServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(address=DEFAULT_ADDRESS, model_path=MODEL_PATH, threshold=THRESHOLD, threads=None,
+          max_batch=MAX_BATCH, max_wait=MAX_WAIT, backend='eager', shortest_edge=SHORTEST_EDGE):
+    """
+    Load the model once and answer detection requests until interrupted.
+
+    Args:
+        address (str): Unix socket path, or "host:port" for a local TCP port
+        model_path (str): Directory of the saved processor and model
+        threshold (float): Minimum score of a detection
+        threads (int): Intra-op threads for inference
+        max_batch (int): Most requests run in one batch
+        max_wait (float): Seconds the first request of a batch waits for others
+        backend (str): Inference backend, see detr_detector.BACKENDS
+        shortest_edge (int): Model input resolution
+    """
+    print(f"Loading model from {model_path}...")
+    detector = DetrDetector(model_path, threshold, threads, backend, shortest_edge)
+
+    # Only listen once the model is loaded, so a successful ping means ready
+    host, _, port = address.rpartition(':')
+    if port.isdigit() and os.path.sep not in address:
+        server = TCPDetectionServer((host or '127.0.0.1', int(port)), DetectionHandler)
+    else:
+        if os.path.exists(address):
+            os.remove(address)
+        server = UnixDetectionServer(address, DetectionHandler)
+    server.batcher = MicroBatcher(detector, max_batch, max_wait)
+
+    print(f"Detection server listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not port.isdigit() and os.path.exists(address):
+            os.remove(address)
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python detect_server.py --address=/tmp/vision_detect.sock --threads=8 --batch=8 --backend=onnx --size=600
+    options = {'address': DEFAULT_ADDRESS, 'threads': None, 'batch': MAX_BATCH, 'backend': 'eager',
+               'size': SHORTEST_EDGE}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            options[name] = value if name in ('address', 'backend') else int(value)
+
+    serve(options['address'], threads=options['threads'], max_batch=options['batch'],
+          backend=options['backend'], shortest_edge=options['size'])
@@ -0,0 +1,183 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from transformers import DetrForObjectDetection, DetrImageProcessor
+
+# Local copy of facebook/detr-resnet-50 (see vision_6_object_detect.ipynb)
+MODEL_PATH = "./model_detr_resnet_50"
+
+# Detections below this score are dropped
+THRESHOLD = 0.9
+
+# Inference backends:
+#   eager       - fp32 PyTorch, the reference
+#   int8        - dynamic int8 quantization of the Linear layers (transformer and heads)
+#   torchscript - fp32 graph traced once per input shape
+#   onnx        - fp32 ONNX export run by onnxruntime (exported once next to the model)
+BACKENDS = ('eager', 'int8', 'torchscript', 'onnx')
+
+# DETR's default input size; smaller values trade accuracy for speed
+SHORTEST_EDGE = 800
+LONGEST_EDGE = 1333
+
+
+class _DetrOutputs(torch.nn.Module):
+    """DETR returning plain (logits, pred_boxes) tensors, for tracing and export."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        outputs = self.model(pixel_values=pixel_values)
+        return outputs.logits, outputs.pred_boxes
+
+
+class DetrDetector:
+    """
+    DETR object detector for batches of same-sized frames, on the CPU.
+
+    Preprocessing (resize + normalize) is a separate step so it can run on
+    other threads while the model is busy; inference runs whole batches
+    under torch.inference_mode.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, threshold=THRESHOLD, threads=None, backend='eager',
+                 shortest_edge=SHORTEST_EDGE):
+        """
+        Args:
+            model_path (str): Directory of the saved processor and model
+            threshold (float): Minimum score of a detection
+            threads (int): Intra-op threads for inference (defaults to the CPU count)
+            backend (str): One of BACKENDS
+            shortest_edge (int): Input resolution; images are resized so their
+                shortest edge is this long (800 is DETR's default)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+
+        threads = threads or os.cpu_count() or 1
+        torch.set_num_threads(threads)
+        try:
+            # One batch at a time: no use for inter-op parallelism
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Already set once in this process
+
+        self.threshold = threshold
+        self.backend = backend
+        self.shortest_edge = shortest_edge
+        self.processor = DetrImageProcessor.from_pretrained(model_path)
+        self.processor.size = {
+            'shortest_edge': shortest_edge,
+            'longest_edge': int(round(shortest_edge * LONGEST_EDGE / SHORTEST_EDGE)),
+        }
+        self.model = DetrForObjectDetection.from_pretrained(model_path).eval()
+        self.labels = self.model.config.id2label
+
+        self._traced = {}
+        self._session = None
+        if backend == 'int8':
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif backend == 'onnx':
+            self._session = self._load_onnx(model_path, threads)
+
+    def _load_onnx(self, model_path, threads):
+        """Export the model to ONNX once (next to the model) and open it with onnxruntime."""
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime")
+
+        onnx_path = os.path.join(model_path, "detr.onnx")
+        if not os.path.exists(onnx_path):
+            print(f"Exporting {onnx_path}...")
+            example = torch.zeros(1, 3, SHORTEST_EDGE, SHORTEST_EDGE)
+            with torch.no_grad():
+                torch.onnx.export(
+                    _DetrOutputs(self.model), (example,), onnx_path,
+                    input_names=['pixel_values'], output_names=['logits', 'pred_boxes'],
+                    dynamic_axes={'pixel_values': {0: 'batch', 2: 'height', 3: 'width'},
+                                  'logits': {0: 'batch'}, 'pred_boxes': {0: 'batch'}},
+                    opset_version=17,
+                )
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        return onnxruntime.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+
+    def _forward(self, batch):
+        """Run the selected backend; returns an object with .logits and .pred_boxes."""
+        if self.backend == 'onnx':
+            logits, boxes = self._session.run(None, {'pixel_values': batch.numpy()})
+            return SimpleNamespace(logits=torch.from_numpy(logits), pred_boxes=torch.from_numpy(boxes))
+
+        if self.backend == 'torchscript':
+            # Traces bake in the input shape; video frames all share one
+            traced = self._traced.get(tuple(batch.shape))
+            if traced is None:
+                # Tracing cannot record inference-mode tensors
+                with torch.inference_mode(False), torch.no_grad():
+                    traced = torch.jit.trace(_DetrOutputs(self.model), (batch.clone(),), check_trace=False)
+                    traced = torch.jit.freeze(traced)
+                self._traced[tuple(batch.shape)] = traced
+            logits, boxes = traced(batch)
+            return SimpleNamespace(logits=logits, pred_boxes=boxes)
+
+        return self.model(pixel_values=batch)
+
+    def preprocess(self, image):
+        """
+        Resize and normalize one RGB image (thread-safe, run it in a pool).
+
+        Args:
+            image: RGB numpy array (height, width, 3) or PIL image
+
+        Returns:
+            torch.Tensor: Pixel values of shape (1, 3, H, W)
+        """
+        return self.processor(images=image, return_tensors="pt")["pixel_values"]
+
+    def detect(self, pixel_values, image_size):
+        """
+        Run the model on a batch of preprocessed frames.
+
+        Args:
+            pixel_values (list): Tensors from preprocess, all the same shape
+            image_size: (height, width) of the original frames, for the boxes,
+                or a list with one (height, width) per frame
+
+        Returns:
+            list: One (scores, labels, boxes) tuple of numpy arrays per frame;
+                boxes are (x_min, y_min, x_max, y_max) in pixels
+        """
+        batch = torch.cat(pixel_values)
+        with torch.inference_mode():
+            outputs = self._forward(batch)
+            sizes = image_size if isinstance(image_size, list) else [image_size] * len(batch)
+            target_sizes = torch.tensor(sizes)
+            results = self.processor.post_process_object_detection(
+                outputs, target_sizes=target_sizes, threshold=self.threshold
+            )
+
+        return [
+            (result["scores"].numpy(), result["labels"].numpy(), result["boxes"].numpy())
+            for result in results
+        ]
+
+    def detect_images(self, images):
+        """
+        Detect objects on a list of same-sized images.
+
+        Args:
+            images (list): RGB numpy arrays or PIL images
+
+        Returns:
+            list: One (scores, labels, boxes) tuple per image, see detect
+        """
+        first = images[0]
+        size = first.shape[:2] if isinstance(first, np.ndarray) else first.size[::-1]
+        return self.detect([self.preprocess(image) for image in images], tuple(size))
@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import get_keyframe_times
+
+from detr_detector import MODEL_PATH, SHORTEST_EDGE, THRESHOLD, DetrDetector
+from video_detect import sample_frames
+
+# Run the detector at least every this many frames
+DETECT_EVERY = 10
+
+# Re-detect early when a track keeps less than this share of its flow points
+MIN_CONFIDENCE = 0.5
+
+# Detections and tracks overlapping at least this much are the same object
+MIN_IOU = 0.3
+
+# Flow points sampled per box, and the least a track keeps before resampling
+MAX_POINTS = 30
+MIN_POINTS = 8
+
+# Forward-backward optical flow error (pixels) above which a point is dropped
+MAX_FB_ERROR = 1.0
+
+_LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                  criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+
+class Track:
+    """One object followed from detection to detection."""
+
+    def __init__(self, track_id, box, label, score):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.label = label
+        self.score = score
+        self.confidence = 1.0
+        self.points = None
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Intersection over union of every pair of (x_min, y_min, x_max, y_max) boxes.
+
+    Returns:
+        numpy.ndarray: Array of shape (len(boxes_a), len(boxes_b))
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(1, -1, 4)
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-6)
+
+
+def associate(tracks, boxes, labels, min_iou=MIN_IOU):
+    """
+    Greedily match detections to tracks of the same label by IoU.
+
+    Returns:
+        dict: Detection index -> matched Track
+    """
+    if not tracks or not len(boxes):
+        return {}
+    overlaps = iou_matrix([track.box for track in tracks], boxes)
+    same_label = np.array([track.label for track in tracks])[:, None] == np.asarray(labels)[None, :]
+    overlaps[~same_label] = 0
+
+    matches = {}
+    for flat in np.argsort(overlaps, axis=None)[::-1]:
+        t, d = np.unravel_index(flat, overlaps.shape)
+        if overlaps[t, d] < min_iou:
+            break
+        if d not in matches and all(match is not tracks[t] for match in matches.values()):
+            matches[d] = tracks[t]
+    return matches
+
+
+def sample_points(gray, box):
+    """Pick corners worth tracking inside a box."""
+    x1, y1, x2, y2 = np.round(box).astype(int)
+    mask = np.zeros_like(gray)
+    mask[max(y1, 0):max(y2, 0), max(x1, 0):max(x2, 0)] = 255
+    points = cv2.goodFeaturesToTrack(gray, MAX_POINTS, 0.01, 3, mask=mask)
+    return points if points is not None else np.zeros((0, 1, 2), np.float32)
+
+
+def flow_update(tracks, prev_gray, gray):
+    """
+    Move every track's box with sparse optical flow from prev_gray to gray.
+
+    All tracks' points go through one forward and one backward Lucas-Kanade
+    pass; points whose round trip drifts more than MAX_FB_ERROR are dropped.
+    Each box moves by the median point displacement and scales by the
+    median change of the points' distance to their centroid. A track's
+    confidence is the share of its points that survived.
+    """
+    counts = [len(track.points) for track in tracks]
+    if not sum(counts):
+        for track in tracks:
+            track.confidence = 0.0
+        return
+
+    old = np.concatenate([track.points for track in tracks]).astype(np.float32)
+    new, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, old, None, **_LK_PARAMS)
+    back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, new, None, **_LK_PARAMS)
+    error = np.linalg.norm((back - old).reshape(-1, 2), axis=1)
+    good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < MAX_FB_ERROR)
+
+    start = 0
+    for track, count in zip(tracks, counts):
+        keep = good[start:start + count]
+        p0 = old[start:start + count][keep].reshape(-1, 2)
+        p1 = new[start:start + count][keep].reshape(-1, 2)
+        start += count
+
+        track.confidence = len(p1) / count if count else 0.0
+        if len(p1) < 2:
+            track.points = p1.reshape(-1, 1, 2)
+            continue
+
+        shift = np.median(p1 - p0, axis=0)
+        spread0 = np.linalg.norm(p0 - p0.mean(axis=0), axis=1)
+        spread1 = np.linalg.norm(p1 - p1.mean(axis=0), axis=1)
+        valid = spread0 > 1e-3
+        scale = float(np.median(spread1[valid] / spread0[valid])) if valid.any() else 1.0
+
+        center = (track.box[:2] + track.box[2:]) / 2 + shift
+        half = (track.box[2:] - track.box[:2]) / 2 * scale
+        track.box = np.concatenate([center - half, center + half]).astype(np.float32)
+        track.points = p1.reshape(-1, 1, 2)
+
+        if len(p1) < MIN_POINTS:
+            track.points = sample_points(gray, track.box)
+
+
+def get_keyframe_indices(video_path, fps):
+    """Frame numbers of the video's keyframes, used as natural re-detection points."""
+    probe = probe_video(video_path)
+    offset = float(probe['format'].get('start_time', 0) or 0)
+    return {int(round((t - offset) * fps)) for t in get_keyframe_times(video_path, get_packet_index(video_path))}
+
+
+def track_video(video_path, output_path, detector=None, every=DETECT_EVERY, on_keyframes=False,
+                min_confidence=MIN_CONFIDENCE, min_iou=MIN_IOU):
+    """
+    Get boxes for every frame of a video, running the detector only now and then.
+
+    The detector runs on every `every`-th frame (and on the video's
+    keyframes if `on_keyframes`); in between, boxes are moved with optical
+    flow. When a track loses too many of its flow points (confidence below
+    `min_confidence`) or leaves the frame, the next frame is detected
+    early. After each detection, detections are matched to the existing
+    tracks by IoU so track ids stay stable.
+
+    The output is a .npz file like detect_video's with one row per track per
+    frame, plus a "track" id column and a "confidence" column (1 on
+    detected frames, the flow confidence on tracked ones).
+
+    Args:
+        video_path (str): Path to the video
+        output_path (str): Path of the .npz file to write
+        detector (DetrDetector): Detector to use (a default one is loaded if None)
+        every (int): Detect at least every this many frames
+        on_keyframes (bool): Also detect on the video's keyframes (scene cuts)
+        min_confidence (float): Track confidence that triggers an early re-detection
+        min_iou (float): Overlap needed to continue a track with a new detection
+
+    Returns:
+        int: Number of rows written
+    """
+    detector = detector or DetrDetector()
+
+    probe = probe_video(video_path)
+    video_stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+    num, _, den = (video_stream.get('avg_frame_rate') or '0/0').partition('/')
+    fps = float(num) / float(den) if float(den or 0) and float(num or 0) else 25.0
+    keyframes = get_keyframe_indices(video_path, fps) if on_keyframes else set()
+
+    rows = {'frame': [], 'track': [], 'label': [], 'score': [], 'confidence': [], 'box': []}
+    tracks = []
+    next_id = 0
+    prev_gray = None
+    since_detection = every
+    detections = 0
+    scale = None
+    started = time.time()
+
+    for frame_idx, frame in sample_frames(video_path, shortest_edge=detector.shortest_edge):
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        if scale is None:
+            # Frames are decoded at model size; report boxes in source pixels
+            scale = video_stream['width'] / frame.shape[1]
+
+        if tracks and prev_gray is not None:
+            flow_update(tracks, prev_gray, gray)
+
+        height, width = gray.shape
+        lost = any(
+            track.confidence < min_confidence
+            or track.box[2] <= 0 or track.box[3] <= 0 or track.box[0] >= width or track.box[1] >= height
+            for track in tracks
+        )
+
+        if since_detection >= every or frame_idx in keyframes or lost:
+            scores, labels, boxes = detector.detect([detector.preprocess(frame)], tuple(frame.shape[:2]))[0]
+            matches = associate(tracks, boxes, labels, min_iou)
+            updated = []
+            for d in range(len(boxes)):
+                track = matches.get(d)
+                if track is None:
+                    track = Track(next_id, boxes[d], int(labels[d]), float(scores[d]))
+                    next_id += 1
+                track.box = boxes[d].astype(np.float32)
+                track.score = float(scores[d])
+                track.confidence = 1.0
+                track.points = sample_points(gray, track.box)
+                updated.append(track)
+            tracks = updated
+            since_detection = 0
+            detections += 1
+
+        for track in tracks:
+            rows['frame'].append(frame_idx)
+            rows['track'].append(track.id)
+            rows['label'].append(track.label)
+            rows['score'].append(track.score)
+            rows['confidence'].append(track.confidence)
+            rows['box'].append(track.box * scale)
+
+        prev_gray = gray
+        since_detection += 1
+        if frame_idx and frame_idx % 500 == 0:
+            print(f"{frame_idx} frames, {detections} detections, "
+                  f"{frame_idx / (time.time() - started):.1f} frames/s")
+
+    frame = np.array(rows['frame'], dtype=np.int32)
+    np.savez_compressed(
+        output_path,
+        frame=frame,
+        time=(frame / fps).astype(np.float32),
+        track=np.array(rows['track'], dtype=np.int32),
+        label=np.array(rows['label'], dtype=np.int16),
+        score=np.array(rows['score'], dtype=np.float32),
+        confidence=np.array(rows['confidence'], dtype=np.float32),
+        box=np.array(rows['box'], dtype=np.float32).reshape(-1, 4),
+        label_names=np.array([detector.labels.get(i, str(i)) for i in range(max(detector.labels) + 1)]),
+    )
+    print(f"{len(frame)} boxes from {detections} detections written to {output_path}")
+    return len(frame)
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python track_detect.py input.mp4 tracks.npz --every=10 --keyframes=1 --threads=8 --backend=int8 --size=600
+    options = {'every': DETECT_EVERY, 'keyframes': 0, 'threads': None, 'backend': 'eager', 'size': SHORTEST_EDGE}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            sys.argv.remove(arg)
+            name, value = arg[2:].split("=", 1)
+            options[name] = value if name == 'backend' else int(value)
+
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "input.mp4"
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "tracks.npz"
+
+    detector = DetrDetector(MODEL_PATH, THRESHOLD, threads=options['threads'],
+                            backend=options['backend'], shortest_edge=options['size'])
+    track_video(video_path, output_path, detector, options['every'], bool(options['keyframes']))
@@ -0,0 +1,186 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video_probe import probe_video
+
+from detr_detector import MODEL_PATH, SHORTEST_EDGE, THRESHOLD, DetrDetector
+
+# DETR resizes the shortest edge to 800 pixels; decoding at that size is enough
+DECODE_SHORTEST_EDGE = 800
+
+
+def sample_frames(video_path, stride=1, shortest_edge=DECODE_SHORTEST_EDGE):
+    """
+    Decode every `stride`-th frame of a video with ffmpeg.
+
+    Frames are dropped and scaled down inside ffmpeg, so only the sampled
+    frames, at model size, cross the pipe.
+
+    Args:
+        video_path (str): Path to the video
+        stride (int): Keep one frame out of `stride`
+        shortest_edge (int): Scale frames down so their shortest edge is at most this
+
+    Yields:
+        tuple: (frame index in the source, RGB numpy array)
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails, so a broken decode
+            never passes for the end of the video
+    """
+    probe = probe_video(video_path)
+    video_stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+    width, height = video_stream['width'], video_stream['height']
+
+    scale = min(1.0, shortest_edge / min(width, height))
+    out_width = max(2, int(round(width * scale / 2)) * 2)
+    out_height = max(2, int(round(height * scale / 2)) * 2)
+
+    filters = []
+    if stride > 1:
+        filters.append(f"select='not(mod(n\\,{stride}))'")
+    if (out_width, out_height) != (width, height):
+        filters.append(f"scale={out_width}:{out_height}")
+
+    cmd = ['ffmpeg', '-v', 'error', '-i', video_path, '-map', '0:v:0']
+    if filters:
+        cmd += ['-vf', ','.join(filters)]
+    cmd += ['-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+
+    # stderr goes to a file so a chatty ffmpeg can never block the pipe
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=log)
+    frame_size = out_width * out_height * 3
+    finished = False
+    try:
+        sample = 0
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                break
+            yield sample * stride, np.frombuffer(data, np.uint8).reshape(out_height, out_width, 3)
+            sample += 1
+        finished = True
+        process.wait()
+        if process.returncode != 0:
+            log.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=log.read().decode('utf8', 'replace'))
+        if data:
+            raise RuntimeError(f"Decoding {video_path} ended in the middle of a frame")
+    finally:
+        process.stdout.close()
+        if not finished:
+            # Stopped early by the consumer: ffmpeg is no longer needed
+            process.kill()
+        process.wait()
+        log.close()
+
+
+def detect_video(video_path, output_path, detector=None, stride=5, batch_size=8, workers=2):
+    """
+    Detect objects on sampled frames of a video and save them as columns.
+
+    Frames are decoded by ffmpeg, preprocessed on a small thread pool and
+    run through the model in batches. At most two batches of frames are
+    held at a time, so memory use does not depend on the video length.
+
+    The output is a .npz file with one row per detection:
+        frame (int32), time (float32, seconds), label (int16),
+        score (float32), box (float32, x_min y_min x_max y_max in pixels
+        of the source video), plus label_names (the label of each id).
+
+    Args:
+        video_path (str): Path to the video
+        output_path (str): Path of the .npz file to write
+        detector (DetrDetector): Detector to use (a default one is loaded if None)
+        stride (int): Run detection on one frame out of `stride`
+        batch_size (int): Frames per inference batch
+        workers (int): Preprocessing threads
+
+    Returns:
+        int: Number of detections written
+    """
+    detector = detector or DetrDetector()
+
+    probe = probe_video(video_path)
+    video_stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+    num, _, den = (video_stream.get('avg_frame_rate') or '0/0').partition('/')
+    fps = float(num) / float(den) if float(den or 0) and float(num or 0) else 25.0
+    # Boxes are reported in source pixels, whatever size the frames were decoded at
+    source_size = (video_stream['height'], video_stream['width'])
+
+    columns = {'frame': [], 'label': [], 'score': [], 'box': []}
+    started = time.time()
+    sampled = 0
+
+    def run_batch(batch):
+        indices = [frame_idx for frame_idx, _ in batch]
+        results = detector.detect([future.result() for _, future in batch], source_size)
+        for frame_idx, (scores, labels, boxes) in zip(indices, results):
+            columns['frame'].append(np.full(len(scores), frame_idx, dtype=np.int32))
+            columns['label'].append(labels.astype(np.int16))
+            columns['score'].append(scores.astype(np.float32))
+            columns['box'].append(boxes.astype(np.float32).reshape(-1, 4))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for frame_idx, frame in sample_frames(video_path, stride, detector.shortest_edge):
+            pending.append((frame_idx, executor.submit(detector.preprocess, frame)))
+            sampled += 1
+            # Keep one batch preprocessing while the previous one is inferred
+            if len(pending) >= 2 * batch_size:
+                run_batch([pending.popleft() for _ in range(batch_size)])
+                print(f"{sampled} frames sampled, {sampled / (time.time() - started):.1f} frames/s")
+        while pending:
+            run_batch([pending.popleft() for _ in range(min(batch_size, len(pending)))])
+
+    frame = np.concatenate(columns['frame']) if columns['frame'] else np.zeros(0, np.int32)
+    np.savez_compressed(
+        output_path,
+        frame=frame,
+        time=(frame / fps).astype(np.float32),
+        label=np.concatenate(columns['label']) if columns['label'] else np.zeros(0, np.int16),
+        score=np.concatenate(columns['score']) if columns['score'] else np.zeros(0, np.float32),
+        box=np.concatenate(columns['box']) if columns['box'] else np.zeros((0, 4), np.float32),
+        label_names=np.array([detector.labels.get(i, str(i)) for i in range(max(detector.labels) + 1)]),
+    )
+    print(f"{len(frame)} detections on {sampled} frames written to {output_path}")
+    return len(frame)
+
+
+def load_detections(path):
+    """
+    Load the detections saved by detect_video.
+
+    Returns:
+        dict: Column name -> numpy array
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python video_detect.py input.mp4 detections.npz --stride=5 --batch=8 --threads=8 --backend=int8 --size=600
+    options = {'stride': 5, 'batch': 8, 'threads': None, 'workers': 2, 'backend': 'eager', 'size': SHORTEST_EDGE}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            sys.argv.remove(arg)
+            name, value = arg[2:].split("=", 1)
+            options[name] = value if name == 'backend' else int(value)
+
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "input.mp4"
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "detections.npz"
+
+    detector = DetrDetector(MODEL_PATH, THRESHOLD, threads=options['threads'],
+                            backend=options['backend'], shortest_edge=options['size'])
+    detect_video(video_path, output_path, detector, options['stride'], options['batch'], options['workers'])
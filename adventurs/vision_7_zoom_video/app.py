@@ -3,6 +3,285 @@ import numpy as np
 import subprocess
 import tempfile
 import os
+import queue
+import sys
+from bisect import bisect_left, bisect_right
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from video_probe import get_packet_index, probe_video
+from vision_1_video_slicer import (
+    get_copy_end,
+    get_frame_tolerance,
+    get_keyframe_times,
+    get_matching_encoder_args,
+)
+
+# Frames decoded but not yet written at any time
+PIPELINE_DEPTH = 32
+
+class BufferPool:
+    """Frame buffers shared by the pipeline workers, handed back once a frame is written."""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.free = queue.SimpleQueue()
+        self.owned = set()
+
+    def get(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            buffer = np.empty(self.shape, dtype=np.uint8)
+            self.owned.add(id(buffer))
+            return buffer
+
+    def recycling(self, writer):
+        """Wrap a writer so written pool buffers go back to the pool."""
+        pool = self
+
+        class RecyclingWriter:
+            def write(self, frame):
+                writer.write(frame)
+                if id(frame) in pool.owned:
+                    pool.free.put(frame)
+
+        return RecyclingWriter()
+
+def read_frames(input_path, width, height, start=None, duration=None):
+    """
+    Decode the video of a file (or a part of it) with ffmpeg, yielding BGR frames.
+    
+    Raises subprocess.CalledProcessError if ffmpeg fails, and RuntimeError
+    if its output ends in the middle of a frame, so a broken decode is never
+    mistaken for a short one.
+    """
+    cmd = ['ffmpeg', '-v', 'error']
+    if start is not None:
+        cmd += ['-ss', f'{start:.6f}']
+    cmd += ['-i', input_path]
+    if duration is not None:
+        cmd += ['-t', f'{duration:.6f}']
+    cmd += ['-map', '0:v:0', '-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+    
+    # stderr goes to a file so a chatty ffmpeg can never block the pipe
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=log)
+    frame_size = width * height * 3
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                break
+            yield np.frombuffer(data, np.uint8).reshape(height, width, 3)
+        finished = True
+        process.wait()
+        if process.returncode != 0:
+            log.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=log.read().decode('utf8', 'replace'))
+        if data:
+            raise RuntimeError(f"Decoding {input_path} ended in the middle of a frame")
+    finally:
+        process.stdout.close()
+        if not finished:
+            # Stopped early by the consumer: ffmpeg is no longer needed
+            process.kill()
+        process.wait()
+        log.close()
+
+def render_segment_only(input_path, output_path, fps, width, height, first_frame, end_frame, process_frame,
+                        wrap_writer=None):
+    """
+    Re-render only the frames [first_frame, end_frame) and stream-copy the rest.
+    
+    The window is snapped out to keyframes. The untouched head and tail of
+    the video are stream-copied, the window is decoded, processed and encoded
+    with the source codec parameters, and the pieces are joined with the
+    concat demuxer while the original audio is copied alongside.
+    
+    `wrap_writer`, if given, wraps the writer of the window (see BufferPool).
+    
+    The number of rendered frames is checked against the source packets of
+    the window before anything is joined; a short or failed decode raises
+    instead of producing a video with frames missing.
+    
+    Returns:
+        bool: False if the source codec cannot be matched (nothing was written)
+    """
+    probe = probe_video(input_path)
+    video_stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+    encoder_args = get_matching_encoder_args(video_stream)
+    if encoder_args is None:
+        return False
+    
+    packets = get_packet_index(input_path)
+    offset = float(probe['format'].get('start_time', 0) or 0)
+    keyframes = [t - offset for t in get_keyframe_times(input_path, packets)]
+    epsilon = get_frame_tolerance(video_stream)
+    
+    # Snap the window out to the keyframe before its start and the one after its end
+    index = bisect_right(keyframes, first_frame / fps + epsilon) - 1
+    window_start = keyframes[index] if index >= 0 else 0.0
+    index = bisect_left(keyframes, end_frame / fps - epsilon)
+    window_end = keyframes[index] if index < len(keyframes) else None
+    
+    # The copied head ends at the keyframe's DTS; render from the first frame decoded after it
+    head_outpoint, render_start = get_copy_end(packets, window_start, offset, epsilon)
+    render_start = max(0.0, render_start)
+    duration = None if window_end is None else window_end - render_start
+    source = os.path.abspath(input_path)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        window_file = os.path.join(temp_dir, "window.mp4")
+        concat_list = os.path.join(temp_dir, "concat_list.txt")
+        
+        rate = video_stream.get('avg_frame_rate', '0/0')
+        writer = FFmpegFrameSink(window_file, rate if rate != '0/0' else fps, width, height, video_args=encoder_args)
+        first_frame = int(round(render_start * fps))
+        rendered = run_frame_pipeline(
+            read_frames(input_path, width, height, render_start, duration),
+            lambda frame, frame_idx: process_frame(frame, first_frame + frame_idx),
+            wrap_writer(writer) if wrap_writer else writer,
+            max_in_flight=PIPELINE_DEPTH
+        )
+        writer.release()
+        
+        # Every source frame of the window must have been rendered
+        window_from = render_start + offset - epsilon
+        window_to = float('inf') if window_end is None else window_end + offset - epsilon
+        expected = sum(1 for pts, _, _ in packets if window_from <= pts < window_to)
+        if rendered != expected:
+            raise RuntimeError(f"Rendered {rendered} frames of the window, expected {expected}")
+        
+        with open(concat_list, 'w') as f:
+            if window_start > epsilon:
+                f.write(f"file '{source}'\noutpoint {head_outpoint:.6f}\n")
+            f.write(f"file '{window_file}'\n")
+            if window_end is not None:
+                f.write(f"file '{source}'\ninpoint {window_end + offset:.6f}\n")
+        
+        subprocess.run([
+            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_list,
+            '-i', input_path, '-map', '0:v:0', '-map', '1:a?', '-c', 'copy', output_path
+        ], capture_output=True, text=True, check=True)
+    
+    return True
+
+# Easing curves for the transition into a zoom keyframe (progress 0-1 -> 0-1)
+EASINGS = {
+    'linear': lambda p: p,
+    'ease_in': lambda p: p * p,
+    'ease_out': lambda p: 1 - (1 - p) ** 2,
+    'ease_in_out': lambda p: p * p * (3 - 2 * p),
+}
+
+def build_zoom_schedule(zoom_keyframes, fps, frame_count, width, height):
+    """
+    Precompute the affine matrix of every frame of a zoom track.
+    
+    Each keyframe is a dict with "time" (seconds), "factor" (1 = no zoom),
+    "x" and "y" (zoom target, 0-1 of the frame size) and an optional "easing"
+    used for the transition from the previous keyframe. Before the first and
+    after the last keyframe their values are held.
+    
+    Returns:
+        tuple: (matrices, identity) - a (frame_count, 2, 3) float array of
+            cv2.warpAffine matrices and a boolean array marking the frames
+            that are left untouched
+    """
+    zoom_keyframes = sorted(zoom_keyframes, key=lambda k: k["time"])
+    times = np.array([k["time"] for k in zoom_keyframes], dtype=np.float64)
+    values = np.array([[k["factor"], k["x"], k["y"]] for k in zoom_keyframes], dtype=np.float64)
+    
+    # Interpolate factor, x and y for every frame, one keyframe segment at a time
+    frame_times = np.arange(frame_count, dtype=np.float64) / fps
+    track = np.empty((frame_count, 3), dtype=np.float64)
+    track[frame_times < times[0]] = values[0]
+    track[frame_times >= times[-1]] = values[-1]
+    for i in range(1, len(zoom_keyframes)):
+        mask = (frame_times >= times[i - 1]) & (frame_times < times[i])
+        if not mask.any():
+            continue
+        progress = (frame_times[mask] - times[i - 1]) / (times[i] - times[i - 1])
+        eased = EASINGS[zoom_keyframes[i].get("easing", "linear")](progress)
+        track[mask] = values[i - 1] + (values[i] - values[i - 1]) * eased[:, None]
+    
+    factor = np.maximum(track[:, 0], 1.0)
+    
+    # Crop window (kept inside the frame) with sub-pixel position, no rounding
+    crop_width = width / factor
+    crop_height = height / factor
+    x1 = np.clip(track[:, 1] * width - crop_width / 2, 0, width - crop_width)
+    y1 = np.clip(track[:, 2] * height - crop_height / 2, 0, height - crop_height)
+    
+    # Map the crop window onto the full frame, pixel centers aligned like cv2.resize
+    matrices = np.zeros((frame_count, 2, 3), dtype=np.float64)
+    matrices[:, 0, 0] = factor
+    matrices[:, 1, 1] = factor
+    matrices[:, 0, 2] = factor * (0.5 - x1) - 0.5
+    matrices[:, 1, 2] = factor * (0.5 - y1) - 0.5
+    
+    identity = factor <= 1.0 + 1e-9
+    return matrices, identity
+
+def apply_zoom_track(input_path, output_path, zoom_keyframes, segment_only=False):
+    """
+    Render a zoom track with any number of zoom keyframes in a single pass.
+    
+    The per-frame transforms are precomputed up front and every zoomed frame
+    is produced with one warpAffine into a reused output buffer.
+    
+    Args:
+        input_path (str): Path to the input video
+        output_path (str): Path to save the output video
+        zoom_keyframes (list): Keyframe dicts, see build_zoom_schedule
+        segment_only (bool): Only re-render the zoomed frames, stream-copy the rest
+    """
+    # Open video
+    cap = cv2.VideoCapture(input_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    matrices, identity = build_zoom_schedule(zoom_keyframes, fps, max(frame_count, 1), width, height)
+    zoomed = np.flatnonzero(~identity)
+    
+    # Output buffers are reused once their frame has been written; at most
+    # PIPELINE_DEPTH frames are in flight, so that is all that gets allocated
+    buffers = BufferPool((height, width, 3))
+    
+    def zoom_frame(frame, current_frame):
+        # Frames past the (estimated) frame count hold the last keyframe
+        index = min(current_frame, len(matrices) - 1)
+        if identity[index]:
+            return frame
+        return cv2.warpAffine(frame, matrices[index], (width, height), dst=buffers.get(),
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    
+    if segment_only and len(zoomed):
+        cap.release()
+        # The last keyframe may hold a zoom until the end of the video
+        end_frame = zoomed[-1] + 1 if zoomed[-1] < len(matrices) - 1 else frame_count
+        if render_segment_only(input_path, output_path, fps, width, height,
+                               zoomed[0], end_frame, zoom_frame, buffers.recycling):
+            return
+        # Codec cannot be matched for stream copy, render every frame instead
+        cap = cv2.VideoCapture(input_path)
+    
+    # Frames are piped straight into the encoder, which also muxes the original audio
+    video_stream = next(s for s in probe_video(input_path)['streams'] if s['codec_type'] == 'video')
+    rate = video_stream.get('avg_frame_rate', '0/0')
+    writer = FFmpegFrameSink(output_path, rate if rate != '0/0' else fps, width, height, audio_source=input_path)
+    
+    # Decode, zoom and encode frames concurrently
+    run_frame_pipeline(read_video_frames(cap), zoom_frame, buffers.recycling(writer), max_in_flight=PIPELINE_DEPTH)
+    
+    cap.release()
+    writer.release()
 
 def apply_zoom_with_audio_and_coordinates(
         input_path, 
@@ -12,20 +291,13 @@ def apply_zoom_with_audio_and_coordinates(
         hold_duration, 
         zoom_factor,
         zoom_x,  # X coordinate (0-1, left to right)
-        zoom_y   # Y coordinate (0-1, top to bottom)
+        zoom_y,  # Y coordinate (0-1, top to bottom)
+        segment_only=False  # Only re-render the zoom window, stream-copy the rest
     ):
-    # Create temp directory
-    temp_dir = tempfile.mkdtemp()
-    
-    # Open video
+    # A single zoom in / hold / zoom out event as a zoom track
     cap = cv2.VideoCapture(input_path)
     fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    # Convert relative coordinates to absolute pixels
-    target_x = int(zoom_x * width)
-    target_y = int(zoom_y * height)
+    cap.release()
     
     # Calculate frame numbers
     zoom_start_frame = int(zoom_start_time * fps)
@@ -33,79 +305,31 @@ def apply_zoom_with_audio_and_coordinates(
     hold_end_frame = zoom_in_end_frame + int(hold_duration * fps)
     zoom_out_end_frame = hold_end_frame + int(zoom_duration * fps)
     
-    # Process frames
-    current_frame = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        if current_frame < zoom_start_frame:
-            processed_frame = frame
-        elif zoom_start_frame <= current_frame < zoom_in_end_frame:
-            progress = (current_frame - zoom_start_frame) / (zoom_in_end_frame - zoom_start_frame)
-            current_zoom = 1 + (zoom_factor - 1) * progress
-            processed_frame = apply_zoom(frame, current_zoom, target_x, target_y, width, height)
-        elif zoom_in_end_frame <= current_frame < hold_end_frame:
-            processed_frame = apply_zoom(frame, zoom_factor, target_x, target_y, width, height)
-        elif hold_end_frame <= current_frame < zoom_out_end_frame:
-            progress = (current_frame - hold_end_frame) / (zoom_out_end_frame - hold_end_frame)
-            current_zoom = zoom_factor - (zoom_factor - 1) * progress
-            processed_frame = apply_zoom(frame, current_zoom, target_x, target_y, width, height)
-        else:
-            processed_frame = frame
-        
-        cv2.imwrite(f"{temp_dir}/frame_{current_frame:04d}.png", processed_frame)
-        current_frame += 1
-    
-    cap.release()
-    
-    # Handle audio
-    subprocess.run([
-        'ffmpeg', '-i', input_path, '-vn', '-acodec', 'copy', 
-        f'{temp_dir}/audio.aac'
-    ], check=True)
-    
-    # Combine video and audio
-    subprocess.run([
-        'ffmpeg', '-framerate', str(fps), '-i', f'{temp_dir}/frame_%04d.png',
-        '-i', f'{temp_dir}/audio.aac', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-        '-c:a', 'aac', '-shortest', output_path
-    ], check=True)
-    
-    # Cleanup
-    for f in os.listdir(temp_dir):
-        os.remove(os.path.join(temp_dir, f))
-    os.rmdir(temp_dir)
-
-def apply_zoom(frame, zoom_factor, target_x, target_y, frame_width, frame_height):
-    """Zoom towards specific coordinates"""
-    # Calculate crop size
-    crop_width = int(frame_width / zoom_factor)
-    crop_height = int(frame_height / zoom_factor)
-    
-    # Calculate crop area (ensure it stays within frame bounds)
-    x1 = max(0, target_x - crop_width // 2)
-    y1 = max(0, target_y - crop_height // 2)
-    
-    # Adjust if crop would go beyond right/bottom edges
-    if x1 + crop_width > frame_width:
-        x1 = frame_width - crop_width
-    if y1 + crop_height > frame_height:
-        y1 = frame_height - crop_height
-    
-    # Crop and resize
-    cropped = frame[y1:y1+crop_height, x1:x1+crop_width]
-    return cv2.resize(cropped, (frame_width, frame_height), interpolation=cv2.INTER_LINEAR)
+    apply_zoom_track(input_path, output_path, [
+        {"time": zoom_start_frame / fps, "factor": 1.0, "x": zoom_x, "y": zoom_y},
+        {"time": zoom_in_end_frame / fps, "factor": zoom_factor, "x": zoom_x, "y": zoom_y},
+        {"time": hold_end_frame / fps, "factor": zoom_factor, "x": zoom_x, "y": zoom_y},
+        {"time": zoom_out_end_frame / fps, "factor": 1.0, "x": zoom_x, "y": zoom_y},
+    ], segment_only)
 
-# Example usage - zoom to point at 30% from left, 70% from top
-apply_zoom_with_audio_and_coordinates(
-    input_path="input.mp4",
-    output_path="output.mp4",
-    zoom_start_time=10,
-    zoom_duration=2,
-    hold_duration=5,
-    zoom_factor=2.0,  # 2x zoom
-    zoom_x=0.3,       # 30% from left
-    zoom_y=0.7        # 70% from top
-)
+if __name__ == "__main__":
+    # Several zooms in one pass with a zoom track:
+    # apply_zoom_track("input.mp4", "output.mp4", [
+    #     {"time": 10, "factor": 1.0, "x": 0.3, "y": 0.7},
+    #     {"time": 12, "factor": 2.0, "x": 0.3, "y": 0.7, "easing": "ease_in_out"},
+    #     {"time": 17, "factor": 2.0, "x": 0.6, "y": 0.4, "easing": "ease_in_out"},
+    #     {"time": 19, "factor": 1.0, "x": 0.6, "y": 0.4, "easing": "ease_out"},
+    # ], segment_only=True)
+    
+    # Example usage - zoom to point at 30% from left, 70% from top
+    apply_zoom_with_audio_and_coordinates(
+        input_path="input.mp4",
+        output_path="output.mp4",
+        zoom_start_time=10,
+        zoom_duration=2,
+        hold_duration=5,
+        zoom_factor=2.0,  # 2x zoom
+        zoom_x=0.3,       # 30% from left
+        zoom_y=0.7,       # 70% from top
+        segment_only=True # Stream-copy everything outside the zoom
+    )
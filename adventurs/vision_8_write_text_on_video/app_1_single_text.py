@@ -1,6 +1,14 @@
 import cv2
+import os
+import sys
 import numpy as np
 
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from text_sprite import TextRenderer
+
 # Input and output file paths
 input_video = 'input.mp4'
 output_video = 'output.mp4'
@@ -11,7 +19,6 @@ position = (480, 320)         # (x, y)
 font = cv2.FONT_HERSHEY_SIMPLEX
 font_scale = 0.8              # Change this value to resize text
 thickness = 2
-line_type = cv2.LINE_AA
 
 # Duration settings
 start_time = 2.0   # seconds
@@ -29,25 +36,24 @@ frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 fps = cap.get(cv2.CAP_PROP_FPS)
 
-# Define the codec and create VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video, fourcc, fps, (frame_width, frame_height))
+out = FFmpegFrameSink(output_video, fps, frame_width, frame_height, audio_source=input_video,
+                      codec='libx264', crf=20, preset='medium', threads=None)
 
-frame_idx = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+# The text is rasterized once and blended by its bounding box on each frame
+text_renderer = TextRenderer()
 
+def draw_text(frame, frame_idx):
     current_time = frame_idx / fps
 
     # Only add text during specified time range
     if start_time <= current_time <= end_time:
-        cv2.putText(frame, text, position, font, font_scale, font_color, thickness, line_type)
+        text_renderer.draw(frame, text, position, font=font, font_scale=font_scale,
+                           color=font_color, thickness=thickness)
+
+    return frame
 
-    # Write the frame
-    out.write(frame)
-    frame_idx += 1
+# Decode, draw and encode on separate threads; frames are written in order
+run_frame_pipeline(read_video_frames(cap), draw_text, out)
 
 # Release everything
 cap.release()
@@ -1,10 +1,22 @@
 import cv2
+import os
+import sys
+
+# Shared helpers live in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_layer import EventLayer
+from frame_pipeline import read_video_frames, run_frame_pipeline
+from frame_sink import FFmpegFrameSink
+from text_sprite import TextRenderer
+from timeline import EventTimeline, load_events
 
 # Input and output file paths
 input_video = 'input.mp4'
 output_video = 'output.mp4'
 
 # Define multiple text overlays with timing and styling
+# Optional keys: "font" (a .ttf path instead of the Hershey font below),
+# "outline": (color, width) and "shadow": (color, (dx, dy))
 text_events = [
     {
         "text": "Welcome!",
@@ -12,7 +24,8 @@ text_events = [
         "end_time": 3.0,
         "position": (380, 480),
         "font_color": (0, 0, 255),   # Red
-        "font_scale": 1.5
+        "font_scale": 1.5,
+        "outline": ((255, 255, 255), 2)
     },
     {
         "text": "This is part one.",
@@ -32,10 +45,19 @@ text_events = [
     },
 ]
 
+# Or load the events from a subtitle track or event file (.srt, .vtt, .json, .jsonl, .csv);
+# the style keys missing from the file are taken from here
+events_file = None
+if events_file:
+    text_events = load_events(events_file, position=(100, 680), font_color=(255, 255, 255),
+                              font_scale=1.0, outline=((0, 0, 0), 2))
+
+# Index the events so each frame only looks at the active ones
+timeline = EventTimeline(text_events)
+
 # Font settings
 font = cv2.FONT_HERSHEY_SIMPLEX
 thickness = 2
-line_type = cv2.LINE_AA
 
 # Open the video
 cap = cv2.VideoCapture(input_video)
@@ -45,35 +67,34 @@ frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 fps = cap.get(cv2.CAP_PROP_FPS)
 
-# Create VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video, fourcc, fps, (frame_width, frame_height))
+out = FFmpegFrameSink(output_video, fps, frame_width, frame_height, audio_source=input_video,
+                      codec='libx264', crf=20, preset='medium', threads=None)
+
+# Each distinct text style is rasterized once and blended by its bounding box
+text_renderer = TextRenderer()
+
+def draw_text_event(frame, event):
+    text_renderer.draw(
+        frame,
+        event["text"],
+        event["position"],
+        font=event.get("font", font),
+        font_scale=event["font_scale"],
+        color=event["font_color"],
+        thickness=thickness,
+        outline=event.get("outline"),
+        shadow=event.get("shadow")
+    )
 
-frame_idx = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+# The active texts are drawn together into one layer, rebuilt only when they change
+text_layer = EventLayer(timeline, draw_text_event, frame_width, frame_height)
 
+def draw_texts(frame, frame_idx):
     current_time = frame_idx / fps
+    return text_layer.draw(frame, current_time)
 
-    # Loop through all text events and draw if active
-    for event in text_events:
-        if event["start_time"] <= current_time <= event["end_time"]:
-            cv2.putText(
-                frame,
-                event["text"],
-                event["position"],
-                font,
-                event["font_scale"],
-                event["font_color"],
-                thickness,
-                line_type
-            )
-
-    # Write the frame to output video
-    out.write(frame)
-    frame_idx += 1
+# Decode, draw and encode on separate threads; frames are written in order
+run_frame_pipeline(read_video_frames(cap), draw_texts, out)
 
 # Release resources
 cap.release()